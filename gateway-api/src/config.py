@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -21,15 +21,26 @@ class Settings(BaseSettings):
     # Configurações de timeouts (em segundos)
     DEFAULT_TIMEOUT: int = Field(default=30, env="DEFAULT_TIMEOUT")
     
+    # Configurações do pool de conexões HTTP compartilhado
+    HTTP_MAX_CONNECTIONS: int = Field(default=200, env="HTTP_MAX_CONNECTIONS")
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=100, env="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    
     # Configurações de autenticação
     JWT_SECRET_KEY: str = Field(default="analisaai-secret-key", env="JWT_SECRET_KEY")
     JWT_ALGORITHM: str = Field(default="HS256", env="JWT_ALGORITHM")
     JWT_EXPIRES_MINUTES: int = Field(default=1440, env="JWT_EXPIRES_MINUTES")  # 24 horas
+    AUTH_ENABLED: bool = Field(default=True, env="AUTH_ENABLED")  # Exige JWT fora das rotas públicas
     
     # Configurações de rate limit
     RATE_LIMIT_ENABLED: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
     RATE_LIMIT_REQUESTS: int = Field(default=100, env="RATE_LIMIT_REQUESTS")  # Requisições por janela
     RATE_LIMIT_WINDOW: int = Field(default=60, env="RATE_LIMIT_WINDOW")  # Janela em segundos
+    # Políticas por prefixo de rota: (prefixo, requisições, janela em segundos); o prefixo mais longo vence
+    RATE_LIMIT_POLICIES: list = Field(default=[
+        ("/api/upload", 10, 60),
+        ("/api/auth/login", 5, 60),
+    ])
+    REDIS_URL: Optional[str] = Field(default=None, env="REDIS_URL")  # Contadores distribuídos; sem Redis usa memória local
     
     class Config:
         env_file = ".env"
@@ -1,10 +1,12 @@
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+import httpx
 import logging
 
 from config import settings
-from middlewares.auth_middleware import auth_middleware
-from middlewares.rate_limiter import rate_limiter_middleware
+from utils.responses import ORJSONResponse
+from middlewares.auth_middleware import AuthMiddleware
+from middlewares.rate_limiter import RateLimiterMiddleware, create_redis_client
 from routes.upload_routes import router as upload_router
 from routes.auth_routes import router as auth_router
 
@@ -20,26 +22,61 @@ app = FastAPI(
     title="Analisa.ai - Gateway API",
     description="API Gateway para o ecossistema Analisa.ai",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Configuração de CORS
+# Métodos e cabeçalhos explícitos evitam a expansão de curingas a cada requisição
+CORS_ALLOWED_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS")
+CORS_ALLOWED_HEADERS = ("authorization", "content-type", "accept", "accept-language")
+
+# Aplicar middlewares globais se ativados
+# O último middleware adicionado é o mais externo: rate limit antes da validação do token
+if settings.AUTH_ENABLED:
+    app.add_middleware(AuthMiddleware)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimiterMiddleware)
+
+# CORS por último (mais externo): preflights não exigem token e respostas 401/429 levam os cabeçalhos CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Credenciais com origem "*" violam a especificação CORS e são ignoradas pelos navegadores
+    allow_credentials="*" not in settings.ALLOWED_ORIGINS,
+    allow_methods=CORS_ALLOWED_METHODS,
+    allow_headers=CORS_ALLOWED_HEADERS,
 )
 
-# Aplicar middlewares globais se ativados
-if settings.RATE_LIMIT_ENABLED:
-    app.middleware("http")(rate_limiter_middleware)
-
 # Inclusão das rotas
 app.include_router(auth_router, prefix="/api/auth", tags=["Autenticação"])
 app.include_router(upload_router, prefix="/api/upload", tags=["Upload"])
 # Outras rotas serão adicionadas conforme os respectivos microserviços sejam desenvolvidos
 
+# Eventos de inicialização e encerramento
+@app.on_event("startup")
+async def startup_event():
+    # Cliente HTTP compartilhado para reaproveitar conexões keep-alive com os microserviços
+    app.state.http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=settings.DEFAULT_TIMEOUT
+    )
+    logger.info("Cliente HTTP compartilhado inicializado")
+    
+    # Cliente Redis para o rate limiting distribuído (None quando não configurado)
+    app.state.redis = create_redis_client()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.http_client.aclose()
+    logger.info("Cliente HTTP compartilhado encerrado")
+    
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
+
 # Rota de verificação de saúde do serviço
 @app.get("/health", tags=["Saúde"])
 async def health_check():
@@ -50,4 +87,11 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=settings.PORT, reload=settings.DEBUG)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
+        reload=settings.DEBUG
+    )
\ No newline at end of file
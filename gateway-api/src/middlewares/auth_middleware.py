@@ -1,10 +1,16 @@
-from fastapi import Request, HTTPException, status
+from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from starlette.types import ASGIApp, Receive, Scope, Send
+import jwt
+from jwt import InvalidTokenError as JWTError
+from cachetools import TTLCache
+import hashlib
 import logging
-from datetime import datetime, timedelta
+import re
+import time
 
 from config import settings
+from utils.responses import ORJSONResponse
 
 # Inicialização do logger
 logger = logging.getLogger("auth-middleware")
@@ -22,68 +28,130 @@ PUBLIC_ROUTES = [
     "/openapi.json"
 ]
 
-async def auth_middleware(request: Request, call_next):
+# Prefixos compilados em uma única alternância ancorada (casamento feito em C)
+PUBLIC_ROUTES_RE = re.compile(r"^(?:" + "|".join(map(re.escape, PUBLIC_ROUTES)) + r")")
+
+# Cache de tokens já validados, indexado pelo hash BLAKE2b do token bruto
+# Armazena (payload, exp) para evitar decodificar/verificar o mesmo token a cada requisição
+TOKEN_CACHE_MAXSIZE = 10_000
+TOKEN_CACHE_MAX_TTL = 300  # Segundos
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_MAX_TTL)
+
+def _unauthorized_response(detail: str) -> ORJSONResponse:
+    """
+    Resposta 401 padrão do middleware de autenticação
     """
-    Middleware para autenticação JWT
+    return ORJSONResponse(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        content={"detail": detail},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _token_cache_key(token: str) -> bytes:
+    """
+    Gera a chave do cache de tokens (BLAKE2b-128 do token)
+    """
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _decode_token(token: str) -> dict:
+    """
+    Decodifica o token JWT reutilizando o payload em cache quando possível
     
-    Verifica o token JWT em todas as rotas que não estão na lista de rotas públicas.
+    Tokens expirados geram HTTPException 401; tokens inválidos propagam JWTError.
     """
-    # Verificar se a rota é pública
-    path = request.url.path
-    if any(path.startswith(route) for route in PUBLIC_ROUTES):
-        return await call_next(request)
+    now = time.time()
+    key = _token_cache_key(token)
+    
+    cached = token_cache.get(key)
+    if cached is not None:
+        payload, exp = cached
+        if exp > now:
+            return payload
+    
+    payload = jwt.decode(
+        token, 
+        settings.JWT_SECRET_KEY,
+        algorithms=[settings.JWT_ALGORITHM]
+    )
     
-    # Se não for uma rota pública, verificar o token JWT
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
+    # Verificar se o token está expirado
+    exp = payload.get("exp", 0)
+    if now > exp:
+        token_cache.pop(key, None)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token de autenticação não fornecido",
+            detail="Token expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    try:
-        scheme, token = auth_header.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Esquema de autenticação inválido",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    # O TTL global limita a permanência; a checagem de exp cobre tokens que expiram antes.
+    # Sem await entre leitura e escrita do cache, o event loop não intercala requisições: dispensa lock
+    token_cache[key] = (payload, exp)
+    
+    return payload
+
+class AuthMiddleware:
+    """
+    Middleware ASGI para autenticação JWT
+    
+    Verifica o token JWT em todas as rotas que não estão na lista de rotas públicas.
+    Implementado diretamente sobre (scope, receive, send) para evitar o custo por
+    requisição do BaseHTTPMiddleware (task extra, stream e reconstrução do Request).
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Verificar se a rota é pública
+        if scope["type"] != "http" or PUBLIC_ROUTES_RE.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
         
-        # Verificar o token JWT
-        payload = jwt.decode(
-            token, 
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        # Se não for uma rota pública, verificar o token JWT
+        auth_header = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
         
-        # Verificar se o token está expirado
-        expiration = datetime.fromtimestamp(payload.get("exp", 0))
-        if datetime.utcnow() > expiration:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token expirado",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        if not auth_header:
+            response = _unauthorized_response("Token de autenticação não fornecido")
+            await response(scope, receive, send)
+            return
         
-        # Anexar informações do usuário à request para uso nas rotas
-        request.state.user = payload.get("sub")
-        request.state.user_id = payload.get("user_id")
-        request.state.user_role = payload.get("role")
+        try:
+            scheme, token = auth_header.split()
+            if scheme.lower() != "bearer":
+                response = _unauthorized_response("Esquema de autenticação inválido")
+                await response(scope, receive, send)
+                return
+            
+            # Verificar o token JWT (com cache de tokens já validados)
+            payload = _decode_token(token)
+        except HTTPException as e:
+            response = ORJSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers)
+            await response(scope, receive, send)
+            return
+        except (JWTError, ValueError) as e:
+            logger.error(f"Erro de autenticação: {str(e)}")
+            response = _unauthorized_response("Token inválido")
+            await response(scope, receive, send)
+            return
+        except Exception as e:
+            logger.error(f"Erro não esperado no middleware de autenticação: {str(e)}")
+            response = ORJSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": "Erro interno do servidor"}
+            )
+            await response(scope, receive, send)
+            return
         
-        return await call_next(request)
+        # Anexar informações do usuário ao state da request para uso nas rotas
+        state = scope.setdefault("state", {})
+        state["user"] = payload.get("sub")
+        state["user_id"] = payload.get("user_id")
+        state["user_role"] = payload.get("role")
         
-    except (JWTError, ValueError) as e:
-        logger.error(f"Erro de autenticação: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    except Exception as e:
-        logger.error(f"Erro não esperado no middleware de autenticação: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erro interno do servidor"
-        )
\ No newline at end of file
+        await self.app(scope, receive, send)
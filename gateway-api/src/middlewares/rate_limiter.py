@@ -1,19 +1,28 @@
-from fastapi import Request, HTTPException, status
+from fastapi import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from cachetools import TTLCache
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
 import time
 import logging
-from collections import defaultdict, deque
-import asyncio
+import re
 
 from config import settings
+from utils.responses import ORJSONResponse
 
 # Inicialização do logger
 logger = logging.getLogger("rate-limiter")
 
-# Dicionário para armazenar as requisições por IP
-request_records = defaultdict(lambda: deque(maxlen=500))
+# Políticas de rate limit por prefixo de rota, com a política global como padrão
+RATE_LIMIT_POLICIES = [("", settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW)] + [
+    tuple(policy) for policy in settings.RATE_LIMIT_POLICIES
+]
 
-# Lock para acesso concorrente aos registros
-rate_limit_lock = asyncio.Lock()
+# Contadores locais por janela, usados quando o Redis não está configurado/disponível
+local_counters = TTLCache(
+    maxsize=100_000,
+    ttl=max(window for _, _, window in RATE_LIMIT_POLICIES) * 2
+)
 
 # Rotas excluídas do rate limiting
 EXCLUDED_ROUTES = [
@@ -23,41 +32,135 @@ EXCLUDED_ROUTES = [
     "/openapi.json"
 ]
 
-async def rate_limiter_middleware(request: Request, call_next):
+# Prefixos compilados em uma única alternância ancorada (casamento feito em C)
+EXCLUDED_ROUTES_RE = re.compile(r"^(?:" + "|".join(map(re.escape, EXCLUDED_ROUTES)) + r")")
+
+def _build_policy_trie(policies) -> dict:
+    """
+    Monta uma trie por segmentos de rota; a chave None de cada nó guarda a política
+    (prefixo, limite, janela, limite já codificado para o header) associada àquele prefixo
+    """
+    root = {}
+    for prefix, limit, window in policies:
+        node = root
+        for segment in filter(None, prefix.split("/")):
+            node = node.setdefault(segment, {})
+        node[None] = (prefix, limit, window, str(limit).encode("latin-1"))
+    return root
+
+RATE_LIMIT_TRIE = _build_policy_trie(RATE_LIMIT_POLICIES)
+
+def resolve_rate_limit_policy(path: str):
+    """
+    Retorna a política do prefixo mais longo que casa com a rota (O(nº de segmentos))
+    """
+    node = RATE_LIMIT_TRIE
+    policy = node[None]
+    for segment in filter(None, path.split("/")):
+        node = node.get(segment)
+        if node is None:
+            break
+        policy = node.get(None, policy)
+    return policy
+
+def create_redis_client():
     """
-    Middleware para limitação de taxa de requisições (rate limiting)
+    Cria o cliente Redis compartilhado, ou None se o Redis não estiver configurado
+    """
+    if not settings.REDIS_URL:
+        return None
+    return aioredis.from_url(settings.REDIS_URL)
+
+async def _increment_redis(redis_client, current_key: str, previous_key: str, window: int):
+    """
+    Incrementa o contador da janela atual no Redis e lê o da janela anterior
+    em um único round-trip (INCR + EXPIRE NX + GET)
+    """
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2, nx=True)
+        pipe.get(previous_key)
+        current_count, _, previous_count = await pipe.execute()
+    return current_count, int(previous_count or 0)
+
+def _increment_local(current_key: str, previous_key: str):
+    """
+    Incrementa o contador da janela atual em memória e lê o da janela anterior
     
-    Limita o número de requisições por IP em uma janela de tempo configurável.
+    Não há await entre a leitura e a escrita, então o event loop não intercala
+    outras requisições aqui e nenhum lock (global ou por IP) é necessário.
+    """
+    current_count = local_counters.get(current_key, 0) + 1
+    local_counters[current_key] = current_count
+    return current_count, local_counters.get(previous_key, 0)
+
+class RateLimiterMiddleware:
     """
-    # Verificar se a rota está excluída do rate limiting
-    path = request.url.path
-    if any(path.startswith(route) for route in EXCLUDED_ROUTES):
-        return await call_next(request)
+    Middleware ASGI para limitação de taxa de requisições (rate limiting)
     
-    # Obter o IP do cliente
-    client_ip = request.client.host
-    current_time = time.time()
+    Limita o número de requisições por IP usando uma janela deslizante aproximada:
+    contador da janela atual + contador da janela anterior ponderado pelo tempo restante.
+    O limite e a janela vêm da política do prefixo de rota mais longo que casa com a requisição.
+    Implementado diretamente sobre (scope, receive, send) para evitar o custo por
+    requisição do BaseHTTPMiddleware (task extra, stream e reconstrução do Request).
+    """
     
-    async with rate_limit_lock:
-        # Remover registros antigos (fora da janela de tempo)
-        while request_records[client_ip] and request_records[client_ip][0] < current_time - settings.RATE_LIMIT_WINDOW:
-            request_records[client_ip].popleft()
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Verificar se a rota está excluída do rate limiting
+        if scope["type"] != "http" or EXCLUDED_ROUTES_RE.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        
+        # Obter o IP do cliente
+        path = scope["path"]
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        current_time = time.time()
+        
+        # Resolver a política da rota e identificar a janela atual e a anterior
+        policy_prefix, limit, window, limit_header = resolve_rate_limit_policy(path)
+        bucket = int(current_time // window)
+        current_key = f"rl:{policy_prefix}:{client_ip}:{bucket}"
+        previous_key = f"rl:{policy_prefix}:{client_ip}:{bucket - 1}"
+        
+        redis_client = getattr(scope["app"].state, "redis", None)
+        if redis_client is not None:
+            try:
+                current_count, previous_count = await _increment_redis(redis_client, current_key, previous_key, window)
+            except RedisError as e:
+                logger.warning(f"Redis indisponível para rate limiting, usando contadores locais: {str(e)}")
+                current_count, previous_count = _increment_local(current_key, previous_key)
+        else:
+            current_count, previous_count = _increment_local(current_key, previous_key)
+        
+        # Estimativa da janela deslizante
+        elapsed = (current_time - bucket * window) / window
+        estimated_count = previous_count * (1 - elapsed) + current_count
         
         # Verificar se o limite foi excedido
-        if len(request_records[client_ip]) >= settings.RATE_LIMIT_REQUESTS:
-            logger.warning(f"Rate limit excedido para IP {client_ip} - {len(request_records[client_ip])} requisições")
-            raise HTTPException(
+        if estimated_count > limit:
+            logger.warning(f"Rate limit excedido para IP {client_ip} - {int(estimated_count)} requisições")
+            response = ORJSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Limite de requisições excedido. Tente novamente em {settings.RATE_LIMIT_WINDOW} segundos."
+                content={"detail": f"Limite de requisições excedido. Tente novamente em {window} segundos."}
             )
+            await response(scope, receive, send)
+            return
         
-        # Registrar a requisição atual
-        request_records[client_ip].append(current_time)
-    
-    # Adicionar headers com informações de rate limit
-    response = await call_next(request)
-    response.headers["X-RateLimit-Limit"] = str(settings.RATE_LIMIT_REQUESTS)
-    response.headers["X-RateLimit-Remaining"] = str(settings.RATE_LIMIT_REQUESTS - len(request_records[client_ip]))
-    response.headers["X-RateLimit-Reset"] = str(int(current_time + settings.RATE_LIMIT_WINDOW))
-    
-    return response
\ No newline at end of file
+        # Headers com informações de rate limit, já codificados
+        rate_limit_headers = [
+            (b"x-ratelimit-limit", limit_header),
+            (b"x-ratelimit-remaining", str(max(0, limit - int(estimated_count))).encode("latin-1")),
+            (b"x-ratelimit-reset", str((bucket + 1) * window).encode("latin-1")),
+        ]
+        
+        # Injetar os headers no início da resposta, sem reconstruir o objeto Response
+        async def send_with_rate_limit_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + rate_limit_headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_rate_limit_headers)
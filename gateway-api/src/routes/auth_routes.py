@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import jwt, JWTError
+import jwt
+from jwt import InvalidTokenError as JWTError
 from pydantic import BaseModel, Field, EmailStr
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import timedelta
+import asyncio
 import logging
+import time
 import uuid
 
 from config import settings
@@ -18,6 +23,9 @@ router = APIRouter()
 # Esquema OAuth2 para autenticação
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Hasher de senhas (Argon2, implementação em C)
+password_hasher = PasswordHasher()
+
 # Modelos de dados
 class UserLogin(BaseModel):
     email: EmailStr
@@ -45,14 +53,14 @@ USERS_DB = {
         "id": "1",
         "name": "Admin",
         "email": "admin@analisaai.com",
-        "password": "admin123",  # Em produção, seria armazenado como hash
+        "password": password_hasher.hash("admin123"),
         "role": "admin"
     },
     "user@analisaai.com": {
         "id": "2",
         "name": "Usuário Demo",
         "email": "user@analisaai.com",
-        "password": "user123",  # Em produção, seria armazenado como hash
+        "password": password_hasher.hash("user123"),
         "role": "user"
     }
 }
@@ -70,14 +78,14 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     """
     to_encode = data.copy()
     
-    # Definir tempo de expiração
+    # Definir tempo de expiração (timestamp inteiro, sem alocar datetime)
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = int(time.time()) + int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRES_MINUTES)
+        expire = int(time.time()) + settings.JWT_EXPIRES_MINUTES * 60
     
     # Adicionar claim de expiração
-    to_encode.update({"exp": expire})
+    to_encode["exp"] = expire
     
     # Codificar token
     encoded_jwt = jwt.encode(
@@ -88,6 +96,22 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     
     return encoded_jwt
 
+def verify_password(password_hash: str, password: str) -> bool:
+    """
+    Verifica a senha contra o hash Argon2 armazenado
+    
+    Args:
+        password_hash: Hash Argon2 armazenado
+        password: Senha em texto puro
+        
+    Returns:
+        True se a senha confere, False caso contrário
+    """
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
@@ -108,8 +132,12 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verificar a senha (em produção, seria verificado o hash)
-    if user["password"] != form_data.password:
+    # Verificar o hash da senha fora do event loop (o KDF é intencionalmente lento)
+    loop = asyncio.get_running_loop()
+    password_valid = await loop.run_in_executor(
+        None, verify_password, user["password"], form_data.password
+    )
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -139,25 +167,29 @@ async def register(user_data: UserRegister):
     Returns:
         Token JWT para o novo usuário
     """
-    # Verificar se o email já está em uso
-    if user_data.email in USERS_DB:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email já está em uso"
-        )
-    
     # Gerar ID único para o novo usuário
     user_id = str(uuid.uuid4())
     
-    # Armazenar usuário (em produção, seria em um banco de dados com senha hash)
-    USERS_DB[user_data.email] = {
+    # Gerar o hash da senha fora do event loop
+    loop = asyncio.get_running_loop()
+    password_hash = await loop.run_in_executor(None, password_hasher.hash, user_data.password)
+    
+    new_user = {
         "id": user_id,
         "name": user_data.name,
         "email": user_data.email,
-        "password": user_data.password,  # Em produção, seria armazenado como hash
+        "password": password_hash,
         "role": "user"  # Papel padrão para novos usuários
     }
     
+    # Armazenar usuário e verificar unicidade do email em uma única operação
+    # (em produção: INSERT ... ON CONFLICT (email) DO NOTHING RETURNING id)
+    if USERS_DB.setdefault(user_data.email, new_user) is not new_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email já está em uso"
+        )
+    
     # Criar token JWT
     access_token = create_access_token(
         data={
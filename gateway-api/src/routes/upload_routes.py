@@ -1,5 +1,5 @@
-import io
 import httpx
+import orjson
 import logging
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
@@ -18,44 +18,74 @@ class DatasetConfirmation(BaseModel):
     dataset_name: str
     description: Optional[str] = None
 
-async def forward_request(url: str, method: str, headers: Dict[str, str] = None, 
+# Tradução de exceções do httpx para respostas HTTP (status, mensagem de log, detalhe)
+# TimeoutException é subclasse de RequestError, por isso precisa vir antes
+FORWARD_EXCEPTIONS = (
+    (httpx.TimeoutException, status.HTTP_504_GATEWAY_TIMEOUT,
+     "Timeout ao encaminhar requisição para", "Timeout na requisição"),
+    (httpx.RequestError, status.HTTP_503_SERVICE_UNAVAILABLE,
+     "Erro ao encaminhar requisição para", "Serviço não disponível"),
+)
+
+FORWARD_DEFAULT_EXCEPTION = (
+    status.HTTP_500_INTERNAL_SERVER_ERROR,
+    "Erro não esperado ao encaminhar requisição para",
+    "Erro interno do servidor",
+)
+
+# Cabeçalhos encaminhados aos microserviços e seus valores padrão
+FORWARD_HEADER_DEFAULTS = (
+    ("Accept", "application/json"),
+    ("Accept-Language", "pt-BR"),
+    ("User-Agent", "AnalisaAI-Gateway"),
+)
+
+def build_forward_headers(request: Request) -> Dict[str, str]:
+    """
+    Monta os cabeçalhos a serem encaminhados, incluindo o token de autenticação se houver
+    """
+    request_headers = request.headers
+    headers = {key: request_headers.get(key, default) for key, default in FORWARD_HEADER_DEFAULTS}
+    
+    authorization = request_headers.get("Authorization")
+    if authorization:
+        headers["Authorization"] = authorization
+    
+    return headers
+
+async def forward_request(client: httpx.AsyncClient, url: str, method: str, headers: Dict[str, str] = None, 
                           params: Dict[str, Any] = None, data: Dict[str, Any] = None, 
                           files: Dict[str, Any] = None, json: Dict[str, Any] = None,
-                          timeout: int = settings.DEFAULT_TIMEOUT):
+                          content: bytes = None, timeout: int = settings.DEFAULT_TIMEOUT):
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.request(
-                method=method,
-                url=url,
-                headers=headers,
-                params=params,
-                data=data,
-                files=files,
-                json=json
-            )
-            
-            return {
-                "status_code": response.status_code,
-                "content": response.json() if response.headers.get("content-type") == "application/json" else response.text,
-                "headers": dict(response.headers)
-            }
-    except httpx.RequestError as e:
-        logger.error(f"Erro ao encaminhar requisição para {url}: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Serviço não disponível: {str(e)}"
-        )
-    except httpx.TimeoutException as e:
-        logger.error(f"Timeout ao encaminhar requisição para {url}: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail=f"Timeout na requisição: {str(e)}"
+        response = await client.request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            data=data,
+            files=files,
+            json=json,
+            content=content,
+            timeout=timeout
         )
+        
+        return {
+            "status_code": response.status_code,
+            "content": orjson.loads(response.content) if response.content and response.headers.get("content-type", "").startswith("application/json") else response.text,
+            "headers": dict(response.headers)
+        }
     except Exception as e:
-        logger.error(f"Erro não esperado ao encaminhar requisição para {url}: {str(e)}")
+        for exc_type, status_code, log_message, detail in FORWARD_EXCEPTIONS:
+            if isinstance(e, exc_type):
+                break
+        else:
+            status_code, log_message, detail = FORWARD_DEFAULT_EXCEPTION
+        
+        logger.error(f"{log_message} {url}: {str(e)}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro interno do servidor: {str(e)}"
+            status_code=status_code,
+            detail=f"{detail}: {str(e)}"
         )
 
 
@@ -71,18 +101,13 @@ async def post_upload_file(
     
     try:
 
-        headers = {
-            "Accept": request.headers.get("Accept", "application/json"),
-            "Accept-Language": request.headers.get("Accept-Language", "pt-BR"),
-            "User-Agent": request.headers.get("User-Agent", "AnalisaAI-Gateway")
-        }
-
-        if "Authorization" in request.headers:
-            headers["Authorization"] = request.headers["Authorization"]
+        headers = build_forward_headers(request)
         
-        file_content = await file.read()
+        # Encaminhar o arquivo temporário subjacente: o httpx lê em blocos ao montar
+        # o corpo multipart, evitando manter o upload inteiro em memória
+        await file.seek(0)
         files = {
-            "file": (file.filename, io.BytesIO(file_content), file.content_type)
+            "file": (file.filename, file.file, file.content_type)
         }
         
         form_data = {}
@@ -92,6 +117,7 @@ async def post_upload_file(
             form_data["encoding"] = encoding
         
         response = await forward_request(
+            client=request.app.state.http_client,
             url=target_url,
             method="POST",
             headers=headers,
@@ -113,16 +139,10 @@ async def get_file_preview(
     target_url = f"{settings.UPLOAD_API_URL}/api/v1/files/{file_id}/preview"
     
     try:
-        headers = {
-            "Accept": request.headers.get("Accept", "application/json"),
-            "Accept-Language": request.headers.get("Accept-Language", "pt-BR"),
-            "User-Agent": request.headers.get("User-Agent", "AnalisaAI-Gateway")
-        }
-        
-        if "Authorization" in request.headers:
-            headers["Authorization"] = request.headers["Authorization"]
+        headers = build_forward_headers(request)
         
         response = await forward_request(
+            client=request.app.state.http_client,
             url=target_url,
             method="GET",
             headers=headers,
@@ -144,16 +164,10 @@ async def get_list_files(
     target_url = f"{settings.UPLOAD_API_URL}/api/v1/files"
     
     try:
-        headers = {
-            "Accept": request.headers.get("Accept", "application/json"),
-            "Accept-Language": request.headers.get("Accept-Language", "pt-BR"),
-            "User-Agent": request.headers.get("User-Agent", "AnalisaAI-Gateway")
-        }
-        
-        if "Authorization" in request.headers:
-            headers["Authorization"] = request.headers["Authorization"]
+        headers = build_forward_headers(request)
         
         response = await forward_request(
+            client=request.app.state.http_client,
             url=target_url,
             method="GET",
             headers=headers,
@@ -175,19 +189,11 @@ async def delete_file(
     
     # Encaminhar requisição para o serviço de upload
     try:
-        # Coletar cabeçalhos relevantes
-        headers = {
-            "Accept": request.headers.get("Accept", "application/json"),
-            "Accept-Language": request.headers.get("Accept-Language", "pt-BR"),
-            "User-Agent": request.headers.get("User-Agent", "AnalisaAI-Gateway")
-        }
-        
-        # Se houver token de autenticação, encaminhar
-        if "Authorization" in request.headers:
-            headers["Authorization"] = request.headers["Authorization"]
+        headers = build_forward_headers(request)
         
         # Encaminhar requisição
         response = await forward_request(
+            client=request.app.state.http_client,
             url=target_url,
             method="DELETE",
             headers=headers
@@ -209,20 +215,16 @@ async def post_confirm_file_upload(
     target_url = f"{settings.UPLOAD_API_URL}/api/v1/files/{file_id}/confirm"
     
     try:
-        headers = {
-            "Accept": request.headers.get("Accept", "application/json"),
-            "Accept-Language": request.headers.get("Accept-Language", "pt-BR"),
-            "User-Agent": request.headers.get("User-Agent", "AnalisaAI-Gateway")
-        }
-        
-        if "Authorization" in request.headers:
-            headers["Authorization"] = request.headers["Authorization"]
+        headers = build_forward_headers(request)
+        headers["Content-Type"] = "application/json"
         
+        # Serializar direto pelo pydantic-core, sem passar pelo json da stdlib no httpx
         response = await forward_request(
+            client=request.app.state.http_client,
             url=target_url,
             method="POST",
             headers=headers,
-            json=confirmation.dict()
+            content=confirmation.model_dump_json().encode()
         )
         
         return response["content"]
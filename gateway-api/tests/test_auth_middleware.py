@@ -0,0 +1,123 @@
+import time
+import types
+import jwt
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from config import settings
+from middlewares import auth_middleware
+from middlewares.auth_middleware import AuthMiddleware, token_cache, _token_cache_key
+
+def create_token(expires_in: int = 3600) -> str:
+    """Gera um token JWT assinado com a chave da aplicação"""
+    payload = {"sub": "user@example.com", "user_id": 1, "role": "user", "exp": int(time.time()) + expires_in}
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    """Conta as decodificações de JWT feitas pelo middleware"""
+    calls = []
+    decode = auth_middleware.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth_middleware, "jwt", types.SimpleNamespace(decode=counting_decode))
+    return calls
+
+@pytest.fixture
+def client():
+    """Aplicação mínima com o middleware de autenticação"""
+    token_cache.clear()
+
+    app = FastAPI()
+    app.add_middleware(AuthMiddleware)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/api/me")
+    async def me(request: Request):
+        return {"user": request.state.user, "user_id": request.state.user_id, "role": request.state.user_role}
+
+    yield TestClient(app)
+    token_cache.clear()
+
+def test_public_route(client):
+    """Testa se rotas públicas dispensam o token"""
+    assert client.get("/health").status_code == 200
+
+def test_missing_token(client):
+    """Testa o 401 quando o token não é enviado"""
+    response = client.get("/api/me")
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Token de autenticação não fornecido"}
+    assert response.headers["www-authenticate"] == "Bearer"
+
+def test_invalid_scheme(client):
+    """Testa o 401 para esquemas de autenticação diferentes de Bearer"""
+    response = client.get("/api/me", headers={"Authorization": f"Basic {create_token()}"})
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Esquema de autenticação inválido"}
+
+def test_valid_token_sets_state(client):
+    """Testa se os dados do token chegam ao state da requisição"""
+    response = client.get("/api/me", headers={"Authorization": f"Bearer {create_token()}"})
+
+    assert response.status_code == 200
+    assert response.json() == {"user": "user@example.com", "user_id": 1, "role": "user"}
+
+def test_token_cache_hit(client, decode_calls):
+    """Testa se um token já validado não é decodificado de novo"""
+    token = create_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/me", headers=headers).status_code == 200
+    assert client.get("/api/me", headers=headers).status_code == 200
+
+    assert decode_calls == [token]
+    assert _token_cache_key(token) in token_cache
+
+def test_invalid_token_not_cached(client, decode_calls):
+    """Testa se tokens inválidos são recusados e não entram no cache"""
+    headers = {"Authorization": "Bearer token-invalido"}
+
+    for _ in range(2):
+        response = client.get("/api/me", headers=headers)
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Token inválido"}
+
+    assert len(decode_calls) == 2
+    assert len(token_cache) == 0
+
+def test_cached_token_expired(client, monkeypatch):
+    """Testa se um token em cache é recusado depois do exp, mesmo antes do TTL do cache"""
+    token = create_token(expires_in=60)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/me", headers=headers).status_code == 200
+
+    real_time = time.time
+    monkeypatch.setattr(auth_middleware, "time", types.SimpleNamespace(time=lambda: real_time() + 120))
+    response = client.get("/api/me", headers=headers)
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Token expirado"}
+    assert _token_cache_key(token) not in token_cache
+
+def test_gateway_requires_token():
+    """Testa se o gateway registra o middleware com o CORS por fora (401 com cabeçalhos CORS, preflight sem token)"""
+    import main
+
+    with TestClient(main.app) as gateway_client:
+        origin = {"Origin": "http://example.com"}
+        response = gateway_client.get("/api/upload/files", headers=origin)
+        assert response.status_code == 401
+        assert "access-control-allow-origin" in response.headers
+
+        preflight = gateway_client.options("/api/upload/files", headers={**origin, "Access-Control-Request-Method": "GET"})
+        assert preflight.status_code == 200
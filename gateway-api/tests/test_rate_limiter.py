@@ -0,0 +1,102 @@
+import types
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from redis import asyncio as aioredis
+
+from config import settings
+from middlewares import rate_limiter
+from middlewares.rate_limiter import RateLimiterMiddleware, resolve_rate_limit_policy, local_counters
+
+WINDOW = settings.RATE_LIMIT_WINDOW
+# Instante fixo no meio de uma janela, para que os contadores não mudem de janela durante o teste
+NOW = 1_000_000 * WINDOW + WINDOW / 2
+BUCKET = int(NOW // WINDOW)
+
+@pytest.fixture
+def app(monkeypatch):
+    """Aplicação mínima com o rate limiter, sem Redis e com o relógio fixo"""
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(time=lambda: NOW))
+    local_counters.clear()
+
+    app = FastAPI()
+    app.add_middleware(RateLimiterMiddleware)
+    app.state.redis = None
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/api/data")
+    async def data():
+        return {"ok": True}
+
+    @app.post("/api/auth/login")
+    async def login():
+        return {"ok": True}
+
+    yield app
+    local_counters.clear()
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+def test_resolve_rate_limit_policy():
+    """Testa se vale a política do prefixo de rota mais longo, por segmentos"""
+    assert resolve_rate_limit_policy("/api/upload/files")[:3] == ("/api/upload", 10, 60)
+    assert resolve_rate_limit_policy("/api/auth/login")[:3] == ("/api/auth/login", 5, 60)
+    assert resolve_rate_limit_policy("/api/auth/register")[:3] == ("", settings.RATE_LIMIT_REQUESTS, WINDOW)
+    # Prefixos casam por segmento inteiro
+    assert resolve_rate_limit_policy("/api/uploads")[:3] == ("", settings.RATE_LIMIT_REQUESTS, WINDOW)
+
+def test_rate_limit_headers(client):
+    """Testa os headers de rate limit na resposta"""
+    response = client.get("/api/data")
+
+    assert response.status_code == 200
+    assert response.headers["x-ratelimit-limit"] == str(settings.RATE_LIMIT_REQUESTS)
+    assert response.headers["x-ratelimit-remaining"] == str(settings.RATE_LIMIT_REQUESTS - 1)
+    assert response.headers["x-ratelimit-reset"] == str((BUCKET + 1) * WINDOW)
+
+def test_excluded_routes(client):
+    """Testa se as rotas excluídas não passam pelo rate limiting"""
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert "x-ratelimit-limit" not in response.headers
+    assert len(local_counters) == 0
+
+def test_rate_limit_exceeded(client):
+    """Testa o 429 ao exceder o limite da política da rota"""
+    for _ in range(5):
+        assert client.post("/api/auth/login").status_code == 200
+
+    response = client.post("/api/auth/login")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": f"Limite de requisições excedido. Tente novamente em {WINDOW} segundos."}
+    # Cada política tem seus próprios contadores
+    assert client.get("/api/data").status_code == 200
+
+def test_sliding_window_weights_previous_window(client):
+    """Testa se o contador da janela anterior é ponderado pelo tempo restante da janela"""
+    local_counters[f"rl:/api/auth/login:testclient:{BUCKET - 1}"] = 6
+
+    # Metade da janela anterior (3) + 1 requisição atual
+    response = client.post("/api/auth/login")
+    assert response.status_code == 200
+    assert response.headers["x-ratelimit-remaining"] == "1"
+
+    client.post("/api/auth/login")
+    assert client.post("/api/auth/login").status_code == 429
+
+def test_local_fallback_when_redis_unavailable(app, client):
+    """Testa se os contadores locais são usados quando o Redis não responde"""
+    app.state.redis = aioredis.from_url("redis://127.0.0.1:1", socket_connect_timeout=0.1)
+
+    response = client.get("/api/data")
+
+    assert response.status_code == 200
+    assert response.headers["x-ratelimit-remaining"] == str(settings.RATE_LIMIT_REQUESTS - 1)
+    assert local_counters[f"rl::testclient:{BUCKET}"] == 1
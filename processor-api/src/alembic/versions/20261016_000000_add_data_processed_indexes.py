@@ -0,0 +1,27 @@
+"""add_data_processed_indexes
+
+Revision ID: 02
+Revises: 01
+Create Date: 2026-10-16 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '02'
+down_revision = '01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_data_processed_dataset_id',
+        'data_processed',
+        ['dataset_id', sa.text('updated_at DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_data_processed_dataset_id', table_name='data_processed')
@@ -0,0 +1,39 @@
+"""server_side_timestamps
+
+Revision ID: 03
+Revises: 02
+Create Date: 2026-10-16 00:00:01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '03'
+down_revision = '02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for column in ('created_at', 'updated_at'):
+        op.alter_column(
+            'data_processed',
+            column,
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime(),
+            server_default=sa.text('now()'),
+            existing_nullable=True,
+        )
+
+
+def downgrade() -> None:
+    for column in ('created_at', 'updated_at'):
+        op.alter_column(
+            'data_processed',
+            column,
+            type_=sa.DateTime(),
+            existing_type=sa.DateTime(timezone=True),
+            server_default=None,
+            existing_nullable=True,
+        )
@@ -0,0 +1,51 @@
+"""jsonb_columns
+
+Revision ID: 04
+Revises: 03
+Create Date: 2026-10-16 00:00:02
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON, JSONB
+
+# revision identifiers, used by Alembic.
+revision = '04'
+down_revision = '03'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = (
+    'preprocessing_config',
+    'feature_engineering_config',
+    'validation_results',
+    'missing_values_report',
+    'outliers_report',
+    'feature_importance',
+    'transformations_applied',
+    'transformation_statistics',
+)
+
+
+def upgrade() -> None:
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'data_processed',
+            column,
+            type_=JSONB,
+            existing_type=JSON,
+            existing_nullable=True,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+
+def downgrade() -> None:
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'data_processed',
+            column,
+            type_=JSON,
+            existing_type=JSONB,
+            existing_nullable=True,
+            postgresql_using=f'{column}::json',
+        )
@@ -1,20 +1,67 @@
 import logging
-from sqlalchemy import create_engine, Column, String, Integer, Boolean, DateTime, MetaData, Table, Float, ForeignKey, select, exists, JSON
+import orjson
+from contextlib import asynccontextmanager
+from typing import Optional, List
+from sqlalchemy import create_engine, Column, String, Integer, Boolean, DateTime, MetaData, Table, Float, ForeignKey, select, exists, JSON, case, func, Index, bindparam, any_
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB, ARRAY
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection
+from sqlalchemy.pool import NullPool
 
 from config import settings
 
 logger = logging.getLogger("database")
 
 db_url = settings.DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://')
-engine = create_async_engine(db_url, echo=settings.DEBUG)
 
-async_session = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
+def json_serializer(value) -> str:
+    """Serializa as colunas JSON com orjson (aceita chaves não-string e tipos numpy)"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+if settings.PGBOUNCER_ENABLED:
+    # O PgBouncer já faz o pool; caches de prepared statements do asyncpg colidem
+    # entre conexões servidoras no modo transaction, então são desativados
+    engine = create_async_engine(
+        db_url,
+        echo=False,
+        echo_pool=False,
+        poolclass=NullPool,
+        json_serializer=json_serializer,
+        json_deserializer=orjson.loads,
+        connect_args={"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    )
+else:
+    # Pool de conexões asyncpg reaproveitado entre requisições
+    engine = create_async_engine(
+        db_url,
+        echo=False,
+        echo_pool=False,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        json_serializer=json_serializer,
+        json_deserializer=orjson.loads,
+        connect_args={"statement_cache_size": 1024, "prepared_statement_cache_size": 256}
+    )
+
+class SQLSampleFilter(logging.Filter):
+    """Deixa passar 1 a cada N registros de log (a formatação só ocorre nos que passam)"""
+    
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self.count = 0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.count += 1
+        return self.count % self.rate == 0
+
+# Log de SQL sob demanda (LOG_SQL), sem o echo do engine renderizar todo statement
+if settings.LOG_SQL:
+    sql_logger = logging.getLogger("sqlalchemy.engine.Engine")
+    sql_logger.setLevel(logging.INFO)
+    sql_logger.addFilter(SQLSampleFilter(settings.LOG_SQL_SAMPLE_RATE))
 
 metadata = MetaData()
 
@@ -25,19 +72,42 @@ data_processed = Table(
     Column("id", String, primary_key=True),
     Column("dataset_id", String, nullable=False),
     Column("target_column", String, nullable=True),
-    Column("preprocessing_config", JSON, nullable=True),
-    Column("feature_engineering_config", JSON, nullable=True),
-    Column("validation_results", JSON, nullable=True),
-    Column("missing_values_report", JSON, nullable=True),
-    Column("outliers_report", JSON, nullable=True),
-    Column("feature_importance", JSON, nullable=True),
-    Column("transformations_applied", JSON, nullable=True),
-    Column("transformation_statistics", JSON, nullable=True), 
+    Column("preprocessing_config", JSONB, nullable=True),
+    Column("feature_engineering_config", JSONB, nullable=True),
+    Column("validation_results", JSONB, nullable=True),
+    Column("missing_values_report", JSONB, nullable=True),
+    Column("outliers_report", JSONB, nullable=True),
+    Column("feature_importance", JSONB, nullable=True),
+    Column("transformations_applied", JSONB, nullable=True),
+    Column("transformation_statistics", JSONB, nullable=True), 
     Column("best_choice", String, nullable=False, default="original"),  # 'processing', 'completed', 'error'
     Column("status", String, nullable=False),  # 'processing', 'completed', 'error'
     Column("error_message", String, nullable=True),
-    Column("created_at", DateTime, default=datetime.now),
-    Column("updated_at", DateTime, default=datetime.now, onupdate=datetime.now),
+    # Timestamps calculados pelo Postgres; os UPDATEs definem updated_at = now() explicitamente
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now(), server_onupdate=func.now()),
+)
+
+# Índice BTREE para o único filtro além da chave primária (processamento mais recente do dataset).
+# As colunas JSON e o status não são filtrados: índices neles só adicionariam custo de escrita
+Index("ix_data_processed_dataset_id", data_processed.c.dataset_id, data_processed.c.updated_at.desc())
+
+# Statements fixos montados uma única vez; os valores seguem como parâmetros na execução,
+# então o SQL gerado é sempre o mesmo e o cache de prepared statements do asyncpg é reaproveitado
+_SELECT_BY_ID = select(data_processed).where(data_processed.c.id == bindparam("processing_id"))
+_SELECT_LATEST_BY_DATASET = (
+    select(data_processed)
+    .where(data_processed.c.dataset_id == bindparam("dataset_id"))
+    .order_by(data_processed.c.updated_at.desc())
+    .limit(1)
+)
+# As colunas do SET vêm das chaves dos parâmetros; updated_at é sempre now() no Postgres.
+# O RETURNING indica, no mesmo round-trip, se o registro existia
+_UPDATE_BY_ID = (
+    data_processed.update()
+    .where(data_processed.c.id == bindparam("processing_id"))
+    .values(updated_at=func.now())
+    .returning(data_processed.c.id)
 )
 
 async def init_db():
@@ -49,100 +119,180 @@ async def init_db():
         logger.error(f"Erro ao inicializar o banco de dados: {str(e)}")
         raise
 
-async def get_db_session():
-    session = async_session()
-    try:
-        yield session
-    finally:
-        await session.close()
+async def get_db_connection():
+    """Dependência FastAPI: uma conexão por requisição, repassada aos serviços e DAOs"""
+    async with engine.connect() as connection:
+        yield connection
 
-async def save_processing_results(processing_data: dict) -> dict:
-    async with async_session() as session:
+@asynccontextmanager
+async def db_connection(connection: Optional[AsyncConnection] = None):
+    """
+    Reutiliza a conexão recebida (ex.: injetada por requisição) ou abre uma nova.
+    As DAOs só usam SQLAlchemy Core, então não há necessidade de Session/unit of work.
+    """
+    if connection is not None:
+        yield connection
+    else:
+        async with engine.connect() as new_connection:
+            yield new_connection
+
+async def upsert_processing_results(processing_data: dict, connection: Optional[AsyncConnection] = None) -> dict:
+    """
+    Insere ou atualiza um registro de processamento em um único round-trip
+    (INSERT ... ON CONFLICT (id) DO UPDATE). O registro deve ser completo o bastante
+    para ser inserido: id, dataset_id e status são obrigatórios.
+    """
+    async with db_connection(connection) as connection:
         try:
             # Verificar se os campos obrigatórios estão presentes
-            if 'dataset_id' not in processing_data or 'status' not in processing_data:
-                logger.error("Campos obrigatórios missing em save_processing_results: dataset_id, status")
-                raise ValueError("Os campos dataset_id e status são obrigatórios")
-                
-            query = data_processed.insert().values(**processing_data)
-            await session.execute(query)
-            await session.commit()
+            if 'id' not in processing_data or 'dataset_id' not in processing_data or 'status' not in processing_data:
+                logger.error("Campos obrigatórios missing em upsert_processing_results: id, dataset_id, status")
+                raise ValueError("Os campos id, dataset_id e status são obrigatórios")
+            
+            query = pg_insert(data_processed).values(**processing_data)
+            update_columns = {
+                name: query.excluded[name]
+                for name in processing_data
+                if name not in ("id", "created_at")
+            }
+            update_columns.setdefault("updated_at", func.now())
+            query = query.on_conflict_do_update(
+                index_elements=[data_processed.c.id],
+                set_=update_columns
+            )
+            
+            await connection.execute(query)
+            await connection.commit()
             logger.info(f"Resultados de processamento para dataset {processing_data['dataset_id']} salvos com sucesso")
             return processing_data
         except SQLAlchemyError as e:
-            await session.rollback()
+            await connection.rollback()
             logger.error(f"Erro ao salvar resultados de processamento: {str(e)}")
             raise
+
+async def save_processing_results(processing_data: dict, connection: Optional[AsyncConnection] = None) -> dict:
+    return await upsert_processing_results(processing_data, connection=connection)
         
-async def update_processing_status(processing_id: str, status: str, error_message: str = None):
-    async with async_session() as session:
+async def update_processing_status(processing_id: str, status: str, error_message: str = None, connection: Optional[AsyncConnection] = None):
+    async with db_connection(connection) as connection:
         try:
-            update_dict = {
-                "status": status,
-                "updated_at": datetime.now()
+            update_params = {
+                "processing_id": processing_id,
+                "status": status
             }
             
             if error_message:
-                update_dict["error_message"] = error_message
-                
-            query = data_processed.update().where(
-                data_processed.c.id == processing_id
-            ).values(**update_dict)
+                update_params["error_message"] = error_message
+            
+            result = await connection.execute(_UPDATE_BY_ID, update_params)
+            updated = result.first() is not None
+            await connection.commit()
+            
+            if not updated:
+                logger.warning(f"Processamento não encontrado ao atualizar status: {processing_id}")
+                return False
             
-            await session.execute(query)
-            await session.commit()
             logger.info(f"Status de processamento atualizado para {status}: {processing_id}")
             return True
         except SQLAlchemyError as e:
-            await session.rollback()
+            await connection.rollback()
             logger.error(f"Erro ao atualizar status de processamento: {str(e)}")
             raise
 
-async def get_processing_results(processing_id: str):
-    async with async_session() as session:
+async def get_processing_results(processing_id: str, connection: Optional[AsyncConnection] = None):
+    async with db_connection(connection) as connection:
         try:
-            query = select(data_processed).where(data_processed.c.id == processing_id)
-            result = await session.execute(query)
-            record = result.fetchone()
+            result = await connection.execute(_SELECT_BY_ID, {"processing_id": processing_id})
+            record = result.mappings().one_or_none()
             
-            if record:
-                return {c.name: getattr(record, c.name) for c in data_processed.columns}
-            else:
-                return None
+            return dict(record) if record else None
         except SQLAlchemyError as e:
             logger.error(f"Erro ao buscar resultados de processamento: {str(e)}")
             raise
 
-async def get_dataset_processing_results(dataset_id: str):
-    async with async_session() as session:
+def _json_array_length(column):
+    """Tamanho de um array JSONB calculado no Postgres (0 para NULL ou valores não-array)"""
+    return case(
+        (func.jsonb_typeof(column) == "array", func.jsonb_array_length(column)),
+        else_=0
+    )
+
+# Projeção enxuta para o resumo do processamento: os relatórios JSON completos
+# não trafegam, apenas a quantidade de itens de cada um
+processing_summary_columns = (
+    data_processed.c.id,
+    data_processed.c.dataset_id,
+    data_processed.c.target_column,
+    data_processed.c.status,
+    data_processed.c.error_message,
+    data_processed.c.validation_results,
+    data_processed.c.transformation_statistics,
+    data_processed.c.created_at,
+    data_processed.c.updated_at,
+    _json_array_length(data_processed.c.transformations_applied).label("transformations_count"),
+    _json_array_length(data_processed.c.missing_values_report).label("missing_values_count"),
+    _json_array_length(data_processed.c.outliers_report).label("outliers_count"),
+)
+
+async def get_processing_summary(processing_id: str, connection: Optional[AsyncConnection] = None):
+    async with db_connection(connection) as connection:
+        try:
+            query = select(*processing_summary_columns).where(data_processed.c.id == processing_id)
+            result = await connection.execute(query)
+            record = result.mappings().one_or_none()
+            
+            return dict(record) if record else None
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao buscar resumo de processamento: {str(e)}")
+            raise
+
+# Resumos de vários processamentos em uma única consulta (id = ANY($1::varchar[]))
+_SELECT_SUMMARIES_BY_IDS = select(*processing_summary_columns).where(
+    data_processed.c.id == any_(bindparam("processing_ids", type_=ARRAY(String)))
+)
+
+async def get_processing_summaries(processing_ids: List[str], connection: Optional[AsyncConnection] = None) -> List[dict]:
+    async with db_connection(connection) as connection:
         try:
-            query = select(data_processed).where(data_processed.c.dataset_id == dataset_id)
-            result = await session.execute(query)
-            record = result.fetchone()
+            result = await connection.execute(_SELECT_SUMMARIES_BY_IDS, {"processing_ids": processing_ids})
             
-            if record:
-                return dict(record)
-            else:
-                return None
+            return [dict(record) for record in result.mappings()]
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao buscar resumos de processamento: {str(e)}")
+            raise
+
+async def get_dataset_processing_results(dataset_id: str, connection: Optional[AsyncConnection] = None):
+    async with db_connection(connection) as connection:
+        try:
+            # Processamento mais recente do dataset (percorre o índice dataset_id, updated_at DESC)
+            result = await connection.execute(_SELECT_LATEST_BY_DATASET, {"dataset_id": dataset_id})
+            record = result.mappings().one_or_none()
+            
+            return dict(record) if record else None
         except SQLAlchemyError as e:
             logger.error(f"Erro ao buscar resultados de processamento para dataset: {str(e)}")
             raise
         
-async def update_processing_results(processing_id: str, update_data: dict):
-    async with async_session() as session:
+async def update_processing_results(processing_id: str, update_data: dict, connection: Optional[AsyncConnection] = None):
+    async with db_connection(connection) as connection:
         try:
-            # Adicionar campo de updated_at automaticamente
-            update_data["updated_at"] = datetime.now()
-                
-            query = data_processed.update().where(
-                data_processed.c.id == processing_id
-            ).values(**update_data)
+            # updated_at é definido pelo próprio statement (now() no Postgres)
+            update_params = {
+                name: value for name, value in update_data.items() if name != "updated_at"
+            }
+            update_params["processing_id"] = processing_id
+            
+            result = await connection.execute(_UPDATE_BY_ID, update_params)
+            updated = result.first() is not None
+            await connection.commit()
+            
+            if not updated:
+                logger.warning(f"Processamento não encontrado ao atualizar registro: {processing_id}")
+                return False
             
-            await session.execute(query)
-            await session.commit()
             logger.info(f"Registro de processamento atualizado: {processing_id}")
             return True
         except SQLAlchemyError as e:
-            await session.rollback()
+            await connection.rollback()
             logger.error(f"Erro ao atualizar registro de processamento: {str(e)}")
             raise
\ No newline at end of file
@@ -1,11 +1,14 @@
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
 import logging
 
 from config import settings
 from routes import processor_routes
 from database.db import init_db
+from services.processor_upload_service import shutdown_processing_pool
+from utils.responses import ORJSONResponse
 
 # Configuração de logging
 logging.basicConfig(
@@ -19,6 +22,7 @@ app = FastAPI(
     title="Analisa.ai - API de Processamento",
     description="Serviço para processamento avançado de datasets utilizando CAFE",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Configuração de CORS
@@ -30,6 +34,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão das respostas JSON maiores (relatórios com muitos nomes de campo repetidos)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Inclusão das rotas
 app.include_router(processor_routes.router, prefix="/api/v1")
 
@@ -40,10 +47,24 @@ async def startup_event():
     await init_db()
     logger.info("API de Processamento inicializada")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Encerrando a API de Processamento...")
+    shutdown_processing_pool()
+
 # Rota de verificação de saúde do serviço
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "processor-api"}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=settings.PORT, reload=settings.DEBUG)
\ No newline at end of file
+    # reload não funciona com múltiplos workers: em modo debug roda um único processo
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
+        reload=settings.DEBUG,
+        workers=None if settings.DEBUG else settings.WORKERS
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 import uuid
@@ -33,6 +33,9 @@ class FeatureSelectionConfig(BaseModel):
     max_features: Optional[int] = None  # Número máximo de features a manter
     min_importance: Optional[float] = 0.01  # Importância mínima para manter a feature
     auto_explore: Optional[bool] = False  # Nova flag para ativar o modo de exploração automática
+    
+    # O /process/auto ajusta method/auto_explore por atribuição; sem revalidação
+    model_config = ConfigDict(validate_assignment=False)
 
 class ProcessingConfig(BaseModel):
     """Configuração completa para processamento de dados"""
@@ -45,6 +48,8 @@ class ProcessingConfig(BaseModel):
     target_column: Optional[str] = None
     columns_to_ignore: Optional[List[str]] = []
     use_auto_explore: Optional[bool] = False
+    
+    model_config = ConfigDict(validate_assignment=False)
 
 class MissingValuesReport(BaseModel):
     """Relatório de valores ausentes por coluna"""
@@ -94,8 +99,7 @@ class ProcessingResult(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     
-    class Config:
-        validate_assignment = True
+    model_config = ConfigDict(validate_assignment=True)
 
 class ValidationMetrics(BaseModel):
     """Métricas de validação do processamento"""
@@ -109,6 +113,10 @@ class ValidationMetrics(BaseModel):
     best_choice: str  # 'original' ou 'transformed'
     metric_used: str  # 'accuracy', 'f1', 'r2', etc.
 
+class BatchStatusRequest(BaseModel):
+    """IDs de processamentos consultados em lote"""
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
 class ProcessingResponse(BaseModel):
     """Resposta simplificada do processamento"""
     id: str
@@ -121,8 +129,6 @@ class ProcessingResponse(BaseModel):
     validation_metrics: Optional[ValidationMetrics] = None
     auto_explore_used: Optional[bool] = False  # Indica se o Explorer foi usado
     
-    class Config:
-        validate_assignment = True
-        json_encoders = {
-            datetime: lambda dt: dt.isoformat()
-        }
\ No newline at end of file
+    # Montada com model_construct nas rotas (dados gerados pela própria API) e
+    # serializada com orjson, que já emite datetimes em ISO 8601
+    model_config = ConfigDict(validate_assignment=False)
@@ -1,32 +1,154 @@
+import os
 import logging
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import Response, FileResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncConnection
 
 from models.processing_models import (
-    ProcessingConfig, ProcessingResult, ProcessingResponse,
+    ProcessingConfig, ProcessingResult, ProcessingResponse, BatchStatusRequest,
     MissingValuesConfig, OutliersConfig, ScalingConfig,
     EncodingConfig, FeatureSelectionConfig
 )
-from services.processor_service import ProcessorService
+from database.db import get_db_connection
+from services.processor_service import ProcessorService, get_cached_response, cache_response
 from services.processor_upload_service import ProcessorUploadService
+from utils.responses import ORJSONResponse
 
 
 logger = logging.getLogger("processor-routes")
 
 router = APIRouter(tags=["Processamento"])
 
-def get_processor_service():
-    return ProcessorService()
+# Resumos fixos do início do processamento, indexados por "exploração automática ativada"
+PROCESSING_STARTED_SUMMARIES = (
+    "Processamento iniciado. Use o endpoint /process/{processing_id} para verificar o status.",
+    "Processamento iniciado. Exploração automática de features ativada."
+    " Use o endpoint /process/{processing_id} para verificar o status.",
+)
+
+# Seleção de features padrão do /process/auto, construída uma vez (sem validação) e copiada
+AUTO_EXPLORE_FEATURE_SELECTION = FeatureSelectionConfig.model_construct(method="auto", auto_explore=True)
+
+# Os serviços não guardam estado por requisição: uma instância por processo basta
+processor_service_instance = ProcessorService()
+processor_upload_service_instance = ProcessorUploadService()
+
+# Dependências async: o FastAPI executa dependências síncronas no threadpool
+async def get_processor_service():
+    return processor_service_instance
+
+async def get_processor_upload_service():
+    return processor_upload_service_instance
+
+def processing_response(response_data: Dict[str, Any]) -> ORJSONResponse:
+    """
+    Serializa a resposta de processamento direto com orjson: os dados já foram montados
+    pela própria API, então dispensam a validação do response_model e o jsonable_encoder
+    """
+    return ORJSONResponse(ProcessingResponse.model_construct(**response_data).model_dump())
+
+def _summary_completed(
+    result: Dict[str, Any],
+    validation_metrics,
+    transformation_statistics: Optional[Dict[str, Any]],
+    target_column: Optional[str]
+) -> str:
+    """Resumo de um processamento concluído, montado em um único join"""
+    parts = [
+        "Processamento concluído com sucesso.",
+        # Incluir informação da coluna target no resumo
+        f" Coluna target: {target_column}." if target_column else "",
+        f" {result.get('transformations_count', 0)} transformações aplicadas, "
+        f"{result.get('missing_values_count', 0)} colunas com valores ausentes tratados, "
+        f"{result.get('outliers_count', 0)} colunas com outliers tratados."
+    ]
+    
+    if transformation_statistics:
+        # Adicionar estatísticas da exploração automática
+        parts.append(
+            f" Exploração automática testou {transformation_statistics.get('total_transformations_tested', 0)} configurações"
+            f" para encontrar a melhor transformação {transformation_statistics.get('best_transformation', 'N/A')}."
+        )
+    
+    if validation_metrics:
+        parts.append(
+            f" Validação recomenda usar dados {validation_metrics.best_choice}. "
+            f"Diferença de performance: {validation_metrics.performance_diff_pct:.2f}%. "
+            f"Redução de features: {validation_metrics.feature_reduction * 100:.1f}%."
+        )
+    
+    return "".join(parts)
+
+def build_processing_response_data(result: Dict[str, Any], processor_service: ProcessorService) -> Dict[str, Any]:
+    """Monta os dados da resposta (resumo, métricas, datas) a partir do resumo do banco"""
+    status = result.get("status")
+    transformation_statistics = result.get("transformation_statistics")
+    target_column = result.get("target_column")
+    
+    # Verificar se o Explorer foi usado
+    auto_explore_used = bool(transformation_statistics)
+    
+    # Formatar métricas de validação
+    validation_metrics = processor_service.get_validation_metrics(result.get("id"), status, result.get("validation_results"))
+    
+    # Gerar resumo baseado no status
+    if status == "completed":
+        summary = _summary_completed(result, validation_metrics, transformation_statistics, target_column)
+    elif status == "error":
+        summary = f"Erro durante o processamento: {result.get('error_message')}"
+    else:
+        summary = "Processamento em andamento..."
+    
+    # Preparar resposta com todos os campos de uma vez (ausentes seguem como None;
+    # created_at/updated_at sempre vêm preenchidos pelo Postgres)
+    return {
+        "id": result.get("id"),
+        "dataset_id": result.get("dataset_id"),
+        "target_column": target_column or None,
+        "status": status,
+        "created_at": result.get("created_at"),
+        "updated_at": result.get("updated_at"),
+        "summary": summary,
+        "validation_metrics": validation_metrics or None,
+        "auto_explore_used": auto_explore_used
+    }
+
+# A partir deste tamanho, o lote é montado e serializado no threadpool para não
+# segurar o event loop; abaixo disso o salto de thread custa mais que a serialização
+BATCH_THREADPOOL_THRESHOLD = 50
 
-def get_processor_upload_service():
-    return ProcessorUploadService()
+def render_processing_batch(responses_data: List[Dict[str, Any]]) -> bytes:
+    """
+    Serializa (orjson) a lista de respostas de um lote de processamentos. Recebe os dados já
+    montados: pode rodar no threadpool sem tocar nos caches do serviço, que não são thread-safe
+    """
+    return orjson.dumps(
+        [ProcessingResponse.model_construct(**response_data).model_dump() for response_data in responses_data],
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+
+async def load_processing_summary(
+    processing_id: str,
+    processor_service: ProcessorService = Depends(get_processor_service),
+    connection: AsyncConnection = Depends(get_db_connection)
+) -> Dict[str, Any]:
+    """Dependência que busca o resumo do processamento da rota ou responde 404"""
+    result = await processor_service.get_processing_summary(processing_id, connection=connection)
+    
+    if not result:
+        raise HTTPException(status_code=404, detail="Processamento não encontrado")
+    
+    return result
 
 
-@router.post("/process", response_model=ProcessingResponse)
+@router.post("/process", responses={200: {"model": ProcessingResponse}})
 async def process_dataset(
     config: ProcessingConfig,
-    background_tasks: BackgroundTasks,
-    processor_upload_service: ProcessorUploadService = Depends(get_processor_upload_service)
+    processor_upload_service: ProcessorUploadService = Depends(get_processor_upload_service),
+    connection: AsyncConnection = Depends(get_db_connection)
 ):
     try:
         if not config.dataset_id:
@@ -47,129 +169,110 @@ async def process_dataset(
             
         target_column = config.target_column
         
-        processing_id = await processor_upload_service.process_dataset(config)
+        processing_id = await processor_upload_service.process_dataset(config, connection=connection)
         
         response = {
             "id": processing_id,
             "dataset_id": config.dataset_id,
             "status": "processing",
             "auto_explore_used": auto_explore,
-            "summary": "Processamento iniciado." + 
-                      (" Exploração automática de features ativada." if auto_explore else "") + 
-                      " Use o endpoint /process/{processing_id} para verificar o status."
+            "summary": PROCESSING_STARTED_SUMMARIES[bool(auto_explore)]
         }
         
         if target_column:
             response["target_column"] = target_column
         
-        # Converter para o modelo
-        return ProcessingResponse(**response)
+        return processing_response(response)
     except Exception as e:
-        logger.error(f"Erro ao iniciar processamento: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro ao iniciar processamento: {str(e)}")
+        # Mensagem formatada uma única vez, para o log e para o detail da resposta
+        detail = f"Erro ao iniciar processamento: {e}"
+        logger.error(detail)
+        raise HTTPException(status_code=500, detail=detail)
 
 
-@router.get("/process/{processing_id}", response_model=ProcessingResponse)
-async def get_processing_result(
-    processing_id: str,
-    processor_service: ProcessorService = Depends(get_processor_service)
+@router.post("/process/batch", responses={200: {"model": List[ProcessingResponse]}})
+async def get_processing_results_batch(
+    request: BatchStatusRequest,
+    processor_service: ProcessorService = Depends(get_processor_service),
+    connection: AsyncConnection = Depends(get_db_connection)
 ):
+    """
+    Consulta o status de vários processamentos em uma única requisição e uma única query.
+    A resposta segue a ordem dos IDs enviados; IDs não encontrados são omitidos.
+    """
     try:
-        result = await processor_service.get_processing_results(processing_id)
+        results = await processor_service.get_processing_summaries_bulk(request.ids, connection=connection)
         
-        if not result:
-            raise HTTPException(status_code=404, detail="Processamento não encontrado")
+        # Métricas e resumos são resolvidos no event loop, onde vivem os caches do serviço
+        responses_data = [build_processing_response_data(result, processor_service) for result in results]
         
-        # Verificar se o Explorer foi usado
-        auto_explore_used = bool(result.get("transformation_statistics"))
-        
-        # Formatar métricas de validação
-        validation_metrics = processor_service.format_validation_metrics(result.get("validation_results"))
-        
-        # Gerar resumo baseado no status
-        summary = ""
-        if result.get("status") == "completed":
-            transformed_features = len(result.get("transformations_applied", [])) if result.get("transformations_applied") else 0
-            missing_values = len(result.get("missing_values_report", [])) if result.get("missing_values_report") else 0
-            outliers = len(result.get("outliers_report", [])) if result.get("outliers_report") else 0
-            
-            # Incluir informação da coluna target no resumo
-            target_info = ""
-            if result.get("target_column"):
-                target_info = f" Coluna target: {result.get('target_column')}."
-            
-            summary = (
-                f"Processamento concluído com sucesso.{target_info} "
-                f"{transformed_features} transformações aplicadas, "
-                f"{missing_values} colunas com valores ausentes tratados, "
-                f"{outliers} colunas com outliers tratados."
-            )
-            
-            if auto_explore_used:
-                # Adicionar estatísticas da exploração automática
-                stats = result.get("transformation_statistics") or {}
-                transformations_tested = stats.get('total_transformations_tested', 0)
-                best_transformation = stats.get('best_transformation', 'N/A')
-                
-                summary += (
-                    f" Exploração automática testou {transformations_tested} configurações" +
-                    f" para encontrar a melhor transformação {best_transformation}."
-                )
-            
-            if validation_metrics:
-                best = validation_metrics.best_choice
-                diff_pct = validation_metrics.performance_diff_pct
-                feature_red_pct = validation_metrics.feature_reduction * 100
-                
-                summary += (
-                    f" Validação recomenda usar dados {best}. "
-                    f"Diferença de performance: {diff_pct:.2f}%. "
-                    f"Redução de features: {feature_red_pct:.1f}%."
-                )
-        elif result.get("status") == "error":
-            summary = f"Erro durante o processamento: {result.get('error_message')}"
+        if len(responses_data) > BATCH_THREADPOOL_THRESHOLD:
+            body = await run_in_threadpool(render_processing_batch, responses_data)
         else:
-            summary = "Processamento em andamento..."
-        
-        # Preparar resposta
-        response_data = {
-            "id": result.get("id"),
-            "dataset_id": result.get("dataset_id"),
-            "status": result.get("status"),
-            "summary": summary,
-            "auto_explore_used": auto_explore_used
-        }
-        
-        # Adicionar a coluna target se disponível
-        if result.get("target_column"):
-            response_data["target_column"] = result.get("target_column")
-        
-        # Adicionar campos de data/hora se existirem
-        if result.get('created_at'):
-            response_data["created_at"] = result.get('created_at')
+            body = render_processing_batch(responses_data)
         
-        if result.get('updated_at'):
-            response_data["updated_at"] = result.get('updated_at')
-        
-        # Adicionar métricas de validação se existirem
-        if validation_metrics:
-            response_data["validation_metrics"] = validation_metrics
+        return Response(content=body, media_type="application/json")
+    except Exception as e:
+        detail = f"Erro ao obter resultados de processamento em lote: {e}"
+        logger.error(detail)
+        raise HTTPException(status_code=500, detail=detail)
+
+@router.get("/process/{processing_id}", responses={200: {"model": ProcessingResponse}})
+async def get_processing_result(
+    processing_id: str,
+    processor_service: ProcessorService = Depends(get_processor_service)
+):
+    # Resposta já serializada em cache: não toca no pool de conexões
+    cached_body = get_cached_response(processing_id)
+    if cached_body is not None:
+        return Response(content=cached_body, media_type="application/json")
+    
+    result = await load_processing_summary(processing_id, processor_service, connection=None)
+    
+    try:
+        response_data = build_processing_response_data(result, processor_service)
         
-        return ProcessingResponse(**response_data)
+        response = processing_response(response_data)
+        cache_response(processing_id, result.get("status"), response.body)
+        return response
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao obter resultados de processamento: {str(e)}")
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Erro ao obter resultados de processamento: {str(e)}"
+        detail = f"Erro ao obter resultados de processamento: {e}"
+        logger.error(detail)
+        raise HTTPException(status_code=500, detail=detail)
+
+@router.get("/process/{processing_id}/dataset")
+async def download_transformed_dataset(
+    processing_id: str,
+    file_format: str = Query("parquet", alias="format", pattern="^(parquet|csv)$"),
+    result: Dict[str, Any] = Depends(load_processing_summary),
+    processor_upload_service: ProcessorUploadService = Depends(get_processor_upload_service)
+):
+    """
+    Baixa o dataset transformado. O formato padrão é Parquet; o CSV é gerado
+    sob demanda a partir dele (ou servido direto em processamentos antigos).
+    """
+    try:
+        file_path = await processor_upload_service.get_transformed_dataset(
+            processing_id, result.get("dataset_id"), file_format
         )
+    except Exception as e:
+        detail = f"Erro ao obter dataset transformado: {e}"
+        logger.error(detail)
+        raise HTTPException(status_code=500, detail=detail)
+    
+    if not file_path:
+        raise HTTPException(status_code=404, detail="Dataset transformado não encontrado")
+    
+    media_type = "text/csv" if file_format == "csv" else "application/vnd.apache.parquet"
+    return FileResponse(file_path, media_type=media_type, filename=os.path.basename(file_path))
 
-@router.post("/process/auto", response_model=ProcessingResponse)
+@router.post("/process/auto", responses={200: {"model": ProcessingResponse}})
 async def process_dataset_auto(
     config: ProcessingConfig,
-    background_tasks: BackgroundTasks,
-    processor_upload_service: ProcessorUploadService = Depends(get_processor_upload_service)
+    processor_upload_service: ProcessorUploadService = Depends(get_processor_upload_service),
+    connection: AsyncConnection = Depends(get_db_connection)
 ):
     """
     Endpoint para processamento com exploração automática de features ativada.
@@ -187,10 +290,7 @@ async def process_dataset_auto(
         config.use_auto_explore = True
         
         if not config.feature_selection:
-            config.feature_selection = FeatureSelectionConfig(
-                method="auto",
-                auto_explore=True
-            )
+            config.feature_selection = AUTO_EXPLORE_FEATURE_SELECTION.model_copy()
         else:
             config.feature_selection.method = "auto"
             config.feature_selection.auto_explore = True
@@ -200,7 +300,7 @@ async def process_dataset_auto(
         if config.target_column:
             target_info = f" Coluna target: {config.target_column}."
             
-        processing_id = await processor_upload_service.process_dataset(config)
+        processing_id = await processor_upload_service.process_dataset(config, connection=connection)
         
         response = {
             "id": processing_id,
@@ -214,8 +314,8 @@ async def process_dataset_auto(
         if config.target_column:
             response["target_column"] = config.target_column
         
-        # Converter para o modelo
-        return ProcessingResponse(**response)
+        return processing_response(response)
     except Exception as e:
-        logger.error(f"Erro ao iniciar processamento automático: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro ao iniciar processamento automático: {str(e)}")
\ No newline at end of file
+        detail = f"Erro ao iniciar processamento automático: {e}"
+        logger.error(detail)
+        raise HTTPException(status_code=500, detail=detail)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import os
+import shutil
+import hashlib
+import logging
+import uuid
+import orjson
+from typing import Dict, Any, Optional
+
+from config import settings
+from models.processing_models import ProcessingConfig
+
+logger = logging.getLogger("pipeline-cache")
+
+# Configurações do CAFE que alteram o resultado do pipeline e entram na chave do cache
+CAFE_SETTINGS_FIELDS = frozenset({
+    "CAFE_AUTO_VALIDATE",
+    "CAFE_CORRELATION_THRESHOLD",
+    "CAFE_GENERATE_FEATURES",
+    "CAFE_MAX_PERFORMANCE_DROP",
+    "CAFE_CV_FOLDS",
+    "DATASET_DOWNCAST"
+})
+
+def hash_file(file_path: str) -> str:
+    """Hash (BLAKE2b) do conteúdo do arquivo, lido em blocos de 1 MiB"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def pipeline_cache_key(content_hash: str, config: ProcessingConfig) -> str:
+    """Chave do resultado: conteúdo do dataset + configuração do processamento + configurações do CAFE"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(content_hash.encode())
+    digest.update(config.model_dump_json().encode())
+    digest.update(settings.model_dump_json(include=CAFE_SETTINGS_FIELDS).encode())
+    return digest.hexdigest()
+
+def _link_file(source_path: str, target_path: str):
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copyfile(source_path, target_path)
+
+def _link_folder(source_folder: str, target_folder: str):
+    os.makedirs(target_folder, exist_ok=True)
+    with os.scandir(source_folder) as entries:
+        for entry in entries:
+            if entry.is_file():
+                _link_file(entry.path, os.path.join(target_folder, entry.name))
+
+def load_cached_results(cache_key: str, report_folder: str) -> Optional[Dict[str, Any]]:
+    """
+    Recupera um resultado em cache: os arquivos gerados (dataset transformado e
+    visualizações) são ligados na pasta do novo processamento
+
+    Returns:
+        Resultados do pipeline ou None se não houver entrada para a chave
+    """
+    entry_folder = os.path.join(settings.PIPELINE_CACHE_FOLDER, cache_key)
+    results_path = os.path.join(entry_folder, "results.json")
+
+    try:
+        with open(results_path, "rb") as f:
+            results = orjson.loads(f.read())
+
+        _link_folder(os.path.join(entry_folder, "files"), report_folder)
+
+        # Uso recente: a remoção de entradas antigas segue o mtime
+        os.utime(entry_folder)
+        return results
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Erro ao ler resultado em cache {cache_key}: {str(e)}")
+        return None
+
+def store_cached_results(cache_key: str, report_folder: str, results: Dict[str, Any]):
+    """Guarda os resultados e os arquivos do processamento (por hardlink) sob a chave"""
+    entry_folder = os.path.join(settings.PIPELINE_CACHE_FOLDER, cache_key)
+    if os.path.exists(entry_folder):
+        return
+
+    # Montada em pasta temporária e renomeada: leitores nunca veem uma entrada incompleta
+    tmp_folder = f"{entry_folder}.{uuid.uuid4().hex}.tmp"
+    try:
+        _link_folder(report_folder, os.path.join(tmp_folder, "files"))
+        with open(os.path.join(tmp_folder, "results.json"), "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
+        os.rename(tmp_folder, entry_folder)
+    except Exception as e:
+        logger.warning(f"Erro ao guardar resultado em cache {cache_key}: {str(e)}")
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        return
+
+    evict_cached_results()
+
+def evict_cached_results():
+    """Remove as entradas menos usadas além de PIPELINE_CACHE_MAX_ENTRIES"""
+    with os.scandir(settings.PIPELINE_CACHE_FOLDER) as entries:
+        cached = [entry for entry in entries if entry.is_dir() and not entry.name.endswith(".tmp")]
+
+    if len(cached) <= settings.PIPELINE_CACHE_MAX_ENTRIES:
+        return
+
+    cached.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in cached[settings.PIPELINE_CACHE_MAX_ENTRIES:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
@@ -6,6 +6,8 @@ import asyncio
 
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+from cachetools import LRUCache, TTLCache
+from sqlalchemy.ext.asyncio import AsyncConnection
 
 from config import settings
 from models.processing_models import (
@@ -14,7 +16,7 @@ from models.processing_models import (
     FeatureImportance, TransformationApplied,
     ValidationMetrics
 )
-from database.db import save_processing_results, update_processing_status, get_processing_results
+from database.db import save_processing_results, update_processing_status, get_processing_results, get_processing_summary, get_processing_summaries
 
 from cafe import (
     create_data_pipeline
@@ -22,19 +24,117 @@ from cafe import (
 
 logger = logging.getLogger("processor-service")
 
+# Status finais: linhas nesses estados não mudam mais e podem ser servidas da memória
+TERMINAL_STATUSES = frozenset({"completed", "error"})
+
+# Cache de leituras de processamentos finalizados, chaveado por (tipo de leitura, processing_id)
+processing_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Respostas já serializadas do GET /process/{id}: processamentos finalizados ficam até
+# serem despejados pelo LRU; os em andamento por meio segundo, absorvendo o polling
+finished_response_cache = LRUCache(maxsize=50_000)
+recent_response_cache = TTLCache(maxsize=10_000, ttl=0.5)
+
+# Métricas de validação já formatadas de processamentos concluídos (entrada imutável)
+validation_metrics_cache = LRUCache(maxsize=10_000)
+
+# Sentinela de ausência no cache (None é um valor válido de métricas)
+MISSING = object()
+
+def get_cached_response(processing_id: str) -> Optional[bytes]:
+    """Retorna o corpo JSON em cache da consulta de um processamento, se houver"""
+    body = finished_response_cache.get(processing_id)
+    if body is None:
+        body = recent_response_cache.get(processing_id)
+    return body
+
+def cache_response(processing_id: str, status: str, body: bytes):
+    """Guarda o corpo JSON da consulta conforme o status do processamento"""
+    if status in TERMINAL_STATUSES:
+        finished_response_cache[processing_id] = body
+    else:
+        recent_response_cache[processing_id] = body
+
+def invalidate_processing_cache(processing_id: str):
+    """Descarta as leituras em cache de um processamento após uma escrita"""
+    processing_cache.pop(("results", processing_id), None)
+    processing_cache.pop(("summary", processing_id), None)
+    finished_response_cache.pop(processing_id, None)
+    recent_response_cache.pop(processing_id, None)
+    validation_metrics_cache.pop(processing_id, None)
+
+# Visualizações geradas pelo pipeline, por nome, e seus arquivos na pasta do processamento
+VISUALIZATION_FILES = {
+    "transformation_tree": "transformation_tree.png",
+    "transformations": "transformations.png",
+    "missing_values": "missing_values.png",
+    "outliers": "outliers.png",
+    "feature_importance": "feature_importance.png",
+    "feature_distributions": "feature_distributions.png",
+    "correlation_matrix": "correlation_matrix.png",
+    "target_correlations": "target_correlations.png"
+}
+
 class ProcessorService:
     
-    async def get_processing_results(self, processing_id: str) -> Optional[ProcessingResult]:
+    async def get_processing_results(self, processing_id: str, connection: Optional[AsyncConnection] = None) -> Optional[ProcessingResult]:
         """Obter resultados de processamento pelo ID"""
+        cached = processing_cache.get(("results", processing_id))
+        if cached is not None:
+            return cached
+        
         try:
-            result = await get_processing_results(processing_id)
+            result = await get_processing_results(processing_id, connection=connection)
             if result:
-                return ProcessingResult(**result)
+                # Dados do próprio banco: dispensa a validação
+                processing_result = ProcessingResult.model_construct(**result)
+                if processing_result.status in TERMINAL_STATUSES:
+                    processing_cache[("results", processing_id)] = processing_result
+                return processing_result
             return None
         except Exception as e:
             logger.error(f"Erro ao obter resultados de processamento {processing_id}: {str(e)}")
             return None
     
+    async def get_processing_summary(self, processing_id: str, connection: Optional[AsyncConnection] = None) -> Optional[Dict[str, Any]]:
+        """Obter o resumo de um processamento (sem os relatórios completos) pelo ID"""
+        cached = processing_cache.get(("summary", processing_id))
+        if cached is not None:
+            return cached
+        
+        try:
+            summary = await get_processing_summary(processing_id, connection=connection)
+            if summary and summary["status"] in TERMINAL_STATUSES:
+                processing_cache[("summary", processing_id)] = summary
+            return summary
+        except Exception as e:
+            logger.error(f"Erro ao obter resumo de processamento {processing_id}: {str(e)}")
+            return None
+    
+    async def get_processing_summaries_bulk(self, processing_ids: List[str], connection: Optional[AsyncConnection] = None) -> List[Dict[str, Any]]:
+        """Obter os resumos de vários processamentos em uma consulta, na ordem dos IDs pedidos"""
+        try:
+            summaries = await get_processing_summaries(list(dict.fromkeys(processing_ids)), connection=connection)
+            summaries_by_id = {summary["id"]: summary for summary in summaries}
+            return [summaries_by_id[processing_id] for processing_id in processing_ids if processing_id in summaries_by_id]
+        except Exception as e:
+            # Propaga o erro: uma lista vazia seria indistinguível de "nenhum ID encontrado"
+            logger.error(f"Erro ao obter resumos de processamento em lote: {str(e)}")
+            raise
+    
+    def get_validation_metrics(self, processing_id: str, status: str, validation_results: Dict[str, Any]) -> Optional[ValidationMetrics]:
+        """Formata as métricas de validação, reaproveitando o resultado de processamentos concluídos"""
+        if status != "completed":
+            return self.format_validation_metrics(validation_results)
+        
+        validation_metrics = validation_metrics_cache.get(processing_id, MISSING)
+        if validation_metrics is not MISSING:
+            return validation_metrics
+        
+        validation_metrics = self.format_validation_metrics(validation_results)
+        validation_metrics_cache[processing_id] = validation_metrics
+        return validation_metrics
+    
     def format_validation_metrics(self, validation_results: Dict[str, Any]) -> Optional[ValidationMetrics]:
         """Formata as métricas de validação do CAFE para o formato esperado pela API"""
         if not validation_results:
@@ -108,23 +208,21 @@ class ProcessorService:
         """
         try:
             report_folder = os.path.join(settings.PROCESSED_FOLDER, processing_id)
-            visualizations = {
-                "transformation_tree": os.path.join(report_folder, "transformation_tree.png"),
-                "transformations": os.path.join(report_folder, "transformations.png"),
-                "missing_values": os.path.join(report_folder, "missing_values.png"),
-                "outliers": os.path.join(report_folder, "outliers.png"),
-                "feature_importance": os.path.join(report_folder, "feature_importance.png"),
-                "feature_distributions": os.path.join(report_folder, "feature_distributions.png"),
-                "correlation_matrix": os.path.join(report_folder, "correlation_matrix.png"),
-                "target_correlations": os.path.join(report_folder, "target_correlations.png")
-            }
+            
+            # Uma única leitura do diretório no lugar de um stat por visualização
+            try:
+                with os.scandir(report_folder) as entries:
+                    existing_files = {entry.name for entry in entries if entry.is_file()}
+            except FileNotFoundError:
+                return {}
             
             # Verificar quais visualizações existem
-            existing_visualizations = {}
-            for name, path in visualizations.items():
-                if os.path.exists(path):
-                    existing_visualizations[name] = path
-                    
+            existing_visualizations = {
+                name: os.path.join(report_folder, file_name)
+                for name, file_name in VISUALIZATION_FILES.items()
+                if file_name in existing_files
+            }
+            
             return existing_visualizations
         except Exception as e:
             logger.error(f"Erro ao recuperar visualizações: {str(e)}")
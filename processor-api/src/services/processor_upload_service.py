@@ -1,18 +1,34 @@
 import os
+import shutil
 import logging
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import io
+import contextlib
+import copy
+import tempfile
+from itertools import chain
 import uuid
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from cachetools import LRUCache
 import matplotlib.pyplot as plt
 
-from typing import Dict, Optional, Any
-from datetime import datetime
+from typing import Dict, Optional, Any, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncConnection
 
 from config import settings
 from models.processing_models import (
     ProcessingConfig, ProcessingResult, 
 )
-from database.db import save_processing_results, update_processing_results, update_processing_status
+from database.db import save_processing_results, upsert_processing_results, update_processing_status
+from services.processor_service import invalidate_processing_cache
+from services.pipeline_cache import hash_file, pipeline_cache_key, load_cached_results, store_cached_results
 
 from cafe import (
     create_data_pipeline,
@@ -23,42 +39,349 @@ from cafe import (
 
 logger = logging.getLogger("processor-service")
 
+def snapshot_original_file(source_path: str, snapshot_path: str):
+    """
+    Guarda a cópia do arquivo original como hardlink (sem regravar bytes);
+    em outro sistema de arquivos, cai para uma cópia simples
+    """
+    if os.path.lexists(snapshot_path):
+        # Reprocessamento do mesmo upload: o hardlink já aponta para o arquivo enviado
+        if os.path.samefile(source_path, snapshot_path):
+            return
+        os.remove(snapshot_path)
+    try:
+        os.link(source_path, snapshot_path)
+    except OSError:
+        shutil.copyfile(source_path, snapshot_path)
+
+# Referências fortes às tarefas em background: o event loop guarda apenas referências
+# fracas, e uma tarefa sem referência pode ser coletada no meio do processamento
+background_tasks: Set[asyncio.Task] = set()
+
+def spawn_background_task(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Pool de processos para o pipeline CAFE (CPU-bound, segura o GIL), criado sob demanda.
+# spawn evita herdar por fork o estado do event loop, das threads e das conexões do processo da API
+processing_pool: Optional[ProcessPoolExecutor] = None
+
+def init_processing_worker():
+    """Configura o logging nos processos filhos do pool"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+def processing_pool_size() -> int:
+    """
+    Tamanho do pool em cada worker do uvicorn: cada worker cria o próprio pool, então o
+    padrão divide as CPUs entre eles (cada processo do pool segura um DataFrame inteiro)
+    """
+    return settings.PROCESSING_POOL_SIZE or max(1, (os.cpu_count() or 1) // max(1, settings.WORKERS))
+
+def get_processing_pool() -> ProcessPoolExecutor:
+    global processing_pool
+    if processing_pool is None:
+        processing_pool = ProcessPoolExecutor(
+            max_workers=processing_pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_processing_worker
+        )
+    return processing_pool
+
+def shutdown_processing_pool():
+    global processing_pool
+    if processing_pool is not None:
+        processing_pool.shutdown(wait=False, cancel_futures=True)
+        processing_pool = None
+
+# Colunas de texto ficam em memória Arrow (sem um objeto Python por célula), com NaN como
+# valor ausente para o CAFE/scikit-learn, quando esse é o dtype de texto do próprio pandas
+# (padrão no pandas 3, opt-in no 2.3). Caso contrário ficam object, como no pd.read_csv
+ARROW_STRING_DTYPE = pd.Series(["texto"]).dtype
+if not isinstance(ARROW_STRING_DTYPE, pd.StringDtype) or ARROW_STRING_DTYPE.storage != "pyarrow":
+    ARROW_STRING_DTYPE = None
+
+def arrow_types_mapper(arrow_type: pa.DataType):
+    """Mapeia só os tipos string do Arrow; numéricos seguem em NumPy"""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return ARROW_STRING_DTYPE
+    return None
+
+# Arquivos IPC do Arrow que levam o dataset ao processo filho: em /dev/shm (memória
+# compartilhada, sem disco) quando disponível, com o diretório temporário como reserva
+DATASET_IPC_FOLDERS = tuple(
+    folder for folder in ("/dev/shm", tempfile.gettempdir()) if os.path.isdir(folder)
+)
+
+def write_dataset_ipc(df: pd.DataFrame, file_path: str):
+    """Grava o DataFrame em formato de arquivo IPC do Arrow para o processo filho mapear"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(file_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def write_dataset_for_worker(df: pd.DataFrame, processing_id: str) -> str:
+    """
+    Grava o dataset para o processo filho e retorna o caminho. Se /dev/shm não comporta
+    o dataset (nos containers o padrão é 64 MB), cai para o diretório temporário
+    """
+    for folder in DATASET_IPC_FOLDERS[:-1]:
+        file_path = os.path.join(folder, f"analisaai-{processing_id}.arrow")
+        try:
+            write_dataset_ipc(df, file_path)
+            return file_path
+        except OSError as e:
+            logger.warning(f"Sem espaço para o dataset em {folder}, usando o próximo diretório: {str(e)}")
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(file_path)
+    
+    file_path = os.path.join(DATASET_IPC_FOLDERS[-1], f"analisaai-{processing_id}.arrow")
+    write_dataset_ipc(df, file_path)
+    return file_path
+
+def read_dataset_ipc(file_path: str) -> pd.DataFrame:
+    """Mapeia o arquivo IPC em memória (sem cópia pelo pipe do pool) e converte para pandas"""
+    table = pa.ipc.open_file(pa.memory_map(file_path)).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=True, types_mapper=arrow_types_mapper)
+
+# Mesmas regras de inferência do pd.read_csv: marcadores de ausente e booleanos padrão do pandas
+CSV_NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+]
+CSV_TRUE_VALUES = ["True", "TRUE", "true"]
+CSV_FALSE_VALUES = ["False", "FALSE", "false"]
+
+def csv_convert_options(**kwargs) -> pacsv.ConvertOptions:
+    return pacsv.ConvertOptions(
+        null_values=CSV_NULL_VALUES,
+        true_values=CSV_TRUE_VALUES,
+        false_values=CSV_FALSE_VALUES,
+        # Campos vazios em colunas de texto viram nulos, como no pd.read_csv
+        strings_can_be_null=True,
+        **kwargs
+    )
+
+def read_dataset_csv(file_path: str) -> pd.DataFrame:
+    """Leitura com o parser CSV multi-thread do Arrow; o pandas só entra na conversão final"""
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=8 << 20)
+    table = pacsv.read_csv(file_path, read_options=read_options, convert_options=csv_convert_options())
+
+    # O Arrow reconhece datas e horários que o pd.read_csv mantém como texto: essas colunas
+    # são relidas como string, preservando o texto original
+    temporal_columns = [field.name for field in table.schema if pa.types.is_temporal(field.type)]
+    if temporal_columns:
+        temporal_table = pacsv.read_csv(
+            file_path,
+            read_options=read_options,
+            convert_options=csv_convert_options(
+                include_columns=temporal_columns,
+                column_types={name: pa.string() for name in temporal_columns}
+            )
+        )
+        for name in temporal_columns:
+            table = table.set_column(table.schema.get_field_index(name), name, temporal_table.column(name))
+
+    # Colunas totalmente vazias: float64 com NaN no pd.read_csv, tipo null no Arrow
+    for index, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(pa.float64()))
+
+    df = table.to_pandas(split_blocks=True, self_destruct=True, types_mapper=arrow_types_mapper)
+    return downcast_dataframe(df) if settings.DATASET_DOWNCAST else df
+
+# Colunas de texto com menos valores distintos que esta fração das linhas viram category
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+def downcast_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduz a memória do dataset antes do pipeline: inteiros e floats no menor tipo que comporta
+    os valores e texto de baixa cardinalidade como category. Opt-in (DATASET_DOWNCAST): tipos
+    menores podem estourar em features geradas e float32 altera levemente as métricas
+    """
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="float")
+        elif pd.api.types.is_string_dtype(series.dtype) and series.nunique() < CATEGORY_MAX_UNIQUE_RATIO * len(series):
+            df[col] = series.astype("category")
+    return df
+
+# Tipos que já chegam nativos nos detalhes das transformações
+NATIVE_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+def to_native(value):
+    """Converte arrays e escalares numpy em valores Python nativos"""
+    # Caminho rápido por tipo exato/isinstance, sem reflexão, para os casos comuns
+    if type(value) in NATIVE_SCALAR_TYPES:
+        return value
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    # Demais objetos com conversão própria (ex.: Series/Index do pandas)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def write_csv(df: pd.DataFrame, file_path: str):
+    """
+    Grava o DataFrame em CSV pelo writer do Arrow, em lotes de linhas e com buffer de 8 MiB.
+    Colunas que o Arrow não consegue tipar (objetos mistos) caem no to_csv do pandas.
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        logger.warning(f"Conversão para Arrow falhou, gravando CSV com pandas: {str(e)}")
+        df.to_csv(file_path, index=False)
+        return
+    
+    raw = io.FileIO(os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644), "wb")
+    with io.BufferedWriter(raw, buffer_size=8 << 20) as buffered:
+        with pacsv.CSVWriter(buffered, table.schema, write_options=pacsv.WriteOptions(include_header=True)) as writer:
+            for batch in table.to_batches(max_chunksize=65536):
+                writer.write_batch(batch)
+
+# Gravação do dataset transformado, em paralelo com a geração dos relatórios (por processo)
+transformed_file_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="transformed-writer")
+
+def write_transformed_dataset(df: pd.DataFrame, report_folder: str, dataset_id: str) -> str:
+    """
+    Grava o dataset transformado em Parquet (colunar, dicionário, Snappy).
+    Colunas que o Arrow não consegue tipar (objetos mistos) caem no CSV.
+    Retorna o caminho gravado.
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        logger.warning(f"Conversão para Arrow falhou, gravando dataset transformado em CSV: {str(e)}")
+        file_path = os.path.join(report_folder, f"{dataset_id}_transformed.csv")
+        df.to_csv(file_path, index=False)
+        return file_path
+    
+    file_path = os.path.join(report_folder, f"{dataset_id}_transformed.parquet")
+    pq.write_table(table, file_path, compression="snappy", use_dictionary=True)
+    return file_path
+
+def transformed_dataset_csv(parquet_path: str) -> str:
+    """Converte sob demanda o Parquet transformado em CSV, reaproveitando uma conversão anterior"""
+    csv_path = parquet_path[:-len(".parquet")] + ".csv"
+    if not os.path.exists(csv_path) or os.path.getmtime(csv_path) < os.path.getmtime(parquet_path):
+        # Grava em arquivo temporário e renomeia, para não servir um CSV pela metade
+        tmp_path = f"{csv_path}.{uuid.uuid4().hex}.tmp"
+        write_csv(pq.read_table(parquet_path).to_pandas(self_destruct=True), tmp_path)
+        os.replace(tmp_path, csv_path)
+    return csv_path
+
+# Campos dos modelos de configuração -> parâmetros correspondentes do CAFE
+MISSING_VALUES_KEY_MAP = {
+    'strategy': 'missing_values_strategy',
+    'categorical_strategy': 'categorical_strategy',
+    'numerical_strategy': 'numerical_strategy',
+    'fill_value': 'imputation_constant'
+}
+OUTLIERS_KEY_MAP = {
+    'detection_method': 'outlier_method',
+    'treatment_strategy': 'outlier_treatment_strategy',
+    'z_threshold': 'z_score_threshold',
+    'iqr_multiplier': 'iqr_multiplier'
+}
+SCALING_KEY_MAP = {
+    'method': 'scaling',
+    'feature_range': 'scaling_feature_range'
+}
+ENCODING_KEY_MAP = {
+    'method': 'categorical_strategy',
+    'max_categories': 'max_categories_for_onehot'
+}
+
+def map_config_section(section, key_map: Dict[str, str]) -> Dict[str, Any]:
+    """Traduz uma seção da configuração para os parâmetros do CAFE (vazia se a seção não veio)"""
+    if not section:
+        return {}
+    return {cafe_key: getattr(section, field) for field, cafe_key in key_map.items()}
+
+# Linha inicial de um processamento, gerada uma vez a partir dos defaults do ProcessingResult.
+# created_at/updated_at ficam a cargo do server_default do Postgres
+INITIAL_RESULT_DEFAULTS = ProcessingResult(dataset_id="", status="processing").model_dump(
+    exclude={"id", "dataset_id", "created_at", "updated_at"}
+)
+
+# Configs do CAFE já traduzidas, indexadas pelo JSON das seções da ProcessingConfig que as
+# definem: o mesmo template reaplicado a vários datasets não é retraduzido
+PREPROCESSOR_CONFIG_FIELDS = frozenset({"missing_values", "outliers", "scaling", "columns_to_ignore"})
+FEATURE_ENGINEER_CONFIG_FIELDS = frozenset({"encoding", "feature_selection"})
+cafe_config_cache = LRUCache(maxsize=256)
+
+def cached_cafe_config(kind: str, config: ProcessingConfig, fields: frozenset, build) -> Dict[str, Any]:
+    key = (kind, config.model_dump_json(include=fields))
+    cafe_config = cafe_config_cache.get(key)
+    if cafe_config is None:
+        cafe_config = cafe_config_cache[key] = build(config)
+    # Cópia profunda: parâmetros aninhados (feature_selection_params, columns_to_ignore)
+    # não são compartilhados com a entrada em cache
+    return copy.deepcopy(cafe_config)
+
+class DatasetTooLargeError(Exception):
+    """Dataset maior que DATASET_MAX_FILE_SIZE_MB: recusado antes de ser carregado"""
+
 class ProcessorUploadService:
     
     async def fetch_dataset(self, dataset_id: str) -> Optional[pd.DataFrame]:
         try:
             
             file_data = os.path.join(settings.UPLOAD_FOLDER, f"{dataset_id}.csv")
-            df = pd.read_csv(file_data)
             
+            # O CAFE precisa do dataset inteiro em memória: acima do limite, recusa antes de carregar
+            max_file_size = settings.DATASET_MAX_FILE_SIZE_MB << 20
+            if max_file_size and os.path.getsize(file_data) > max_file_size:
+                raise DatasetTooLargeError(
+                    f"O dataset excede o limite de {settings.DATASET_MAX_FILE_SIZE_MB} MB para processamento"
+                )
+            
+            # O original é o próprio arquivo enviado: não há por que regravá-lo a partir do DataFrame.
+            # A cópia (hardlink, ou cópia em outro sistema de arquivos) corre junto com a leitura
             file_path = os.path.join(settings.PROCESSED_FOLDER, f"{dataset_id}_original.csv")
-            df.to_csv(file_path)
+            _, df = await asyncio.gather(
+                asyncio.to_thread(snapshot_original_file, file_data, file_path),
+                asyncio.to_thread(read_dataset_csv, file_data)
+            )
+            
+            if settings.PIPELINE_CACHE_ENABLED:
+                # Conteúdo do upload identifica o dataset no cache de resultados do pipeline
+                df.attrs["content_hash"] = await asyncio.to_thread(hash_file, file_data)
             
             logger.info(f"Dataset {dataset_id} carregado com sucesso: {df.shape[0]} linhas, {df.shape[1]} colunas")
             return df
-                
+        
+        except DatasetTooLargeError as e:
+            logger.error(f"Dataset {dataset_id} recusado: {str(e)}")
+            raise
         except Exception as e:
             logger.error(f"Erro ao buscar dataset {dataset_id}: {str(e)}")
             return None
     
-    async def process_dataset(self, config: ProcessingConfig) -> str:
+    async def process_dataset(self, config: ProcessingConfig, connection: Optional[AsyncConnection] = None) -> str:
         
         processing_id = str(uuid.uuid4())
         
-        # Salvar entrada inicial no banco de dados
-        initial_result = ProcessingResult(
-            id=processing_id,
-            dataset_id=config.dataset_id,
-            target_column=config.target_column, 
-            status="processing",
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-            transformation_statistics={}
-        )
+        # Salvar entrada inicial no banco de dados (defaults pré-calculados + campos da requisição)
+        initial_result = INITIAL_RESULT_DEFAULTS | {
+            "id": processing_id,
+            "dataset_id": config.dataset_id,
+            "target_column": config.target_column
+        }
         
-        await save_processing_results(initial_result.dict())
+        await save_processing_results(initial_result, connection=connection)
         
-        task = asyncio.create_task(self._process_dataset_task(processing_id, config))
+        # A tarefa em background abre as próprias conexões: a da requisição é fechada ao responder
+        task = spawn_background_task(self._process_dataset_task(processing_id, config))
         
         task.add_done_callback(
             lambda t: self._handle_task_exception(t, processing_id)
@@ -66,78 +389,85 @@ class ProcessorUploadService:
 
         return processing_id
     
+    async def get_transformed_dataset(self, processing_id: str, dataset_id: str, file_format: str = "parquet") -> Optional[str]:
+        """
+        Localiza o dataset transformado de um processamento
+        
+        Args:
+            processing_id: ID do processamento
+            dataset_id: ID do dataset processado
+            file_format: 'parquet' ou 'csv' (convertido sob demanda a partir do Parquet)
+            
+        Returns:
+            Caminho do arquivo ou None se não existir no formato pedido
+        """
+        report_folder = os.path.join(settings.PROCESSED_FOLDER, processing_id)
+        parquet_path = os.path.join(report_folder, f"{dataset_id}_transformed.parquet")
+        # Processamentos antigos (ou com colunas não tipáveis) só têm o CSV
+        csv_path = os.path.join(report_folder, f"{dataset_id}_transformed.csv")
+        
+        if not os.path.exists(parquet_path):
+            return csv_path if file_format == "csv" and os.path.exists(csv_path) else None
+        
+        if file_format == "parquet":
+            return parquet_path
+        
+        return await asyncio.to_thread(transformed_dataset_csv, parquet_path)
+    
     def _handle_task_exception(self, task, processing_id):
         try:
+            if task.cancelled():
+                return
+            
             exc = task.exception()
             if exc:
                 logger.error(f"Erro durante processamento {processing_id}: {str(exc)}")
                 
-                loop = asyncio.get_event_loop()
-                loop.run_until_complete(
-                    update_processing_status(
-                        processing_id, 
-                        "error", 
-                        error_message=f"Erro durante processamento: {str(exc)}"
-                    )
-                )
+                # Callback roda dentro do event loop: a atualização vira outra tarefa em background
+                spawn_background_task(self._mark_processing_error(processing_id, exc))
         except Exception as e:
             logger.error(f"Erro ao lidar com exceção da tarefa: {str(e)}")
+    
+    async def _mark_processing_error(self, processing_id: str, exc: BaseException):
+        try:
+            await update_processing_status(
+                processing_id, 
+                "error", 
+                error_message=f"Erro durante processamento: {str(exc)}"
+            )
+        finally:
+            invalidate_processing_cache(processing_id)
 
     def _build_preprocessor_config(self, config: ProcessingConfig) -> Dict[str, Any]:
-        preprocessor_config = {}
-        
-        if config.missing_values:
-            missing_config = {
-                'missing_values_strategy': config.missing_values.strategy,
-                'categorical_strategy': config.missing_values.categorical_strategy,
-                'numerical_strategy': config.missing_values.numerical_strategy,
-                'imputation_constant': config.missing_values.fill_value
-            }
-            preprocessor_config.update(missing_config)
-        
-        if config.outliers:
-            outliers_config = {
-                'outlier_method': config.outliers.detection_method,
-                'outlier_treatment_strategy': config.outliers.treatment_strategy,
-                'z_score_threshold': config.outliers.z_threshold,
-                'iqr_multiplier': config.outliers.iqr_multiplier
-            }
-            preprocessor_config.update(outliers_config)
-        
-        if config.scaling:
-            scaling_config = {
-                'scaling': config.scaling.method,
-                'scaling_feature_range': config.scaling.feature_range
-            }
-            preprocessor_config.update(scaling_config)
+        return cached_cafe_config("preprocessor", config, PREPROCESSOR_CONFIG_FIELDS, self._map_preprocessor_config)
+    
+    def _build_feature_engineer_config(self, config: ProcessingConfig) -> Dict[str, Any]:
+        return cached_cafe_config("feature_engineer", config, FEATURE_ENGINEER_CONFIG_FIELDS, self._map_feature_engineer_config)
+    
+    def _map_preprocessor_config(self, config: ProcessingConfig) -> Dict[str, Any]:
+        preprocessor_config = (
+            map_config_section(config.missing_values, MISSING_VALUES_KEY_MAP)
+            | map_config_section(config.outliers, OUTLIERS_KEY_MAP)
+            | map_config_section(config.scaling, SCALING_KEY_MAP)
+        )
         
         if config.columns_to_ignore:
             preprocessor_config['columns_to_ignore'] = config.columns_to_ignore
             
         return preprocessor_config
     
-    def _build_feature_engineer_config(self, config: ProcessingConfig) -> Dict[str, Any]:
+    def _map_feature_engineer_config(self, config: ProcessingConfig) -> Dict[str, Any]:
         feature_config = {
             'correlation_threshold': settings.CAFE_CORRELATION_THRESHOLD,
             'generate_features': settings.CAFE_GENERATE_FEATURES
-        }
-        
-        if config.encoding:
-            encoding_config = {
-                'categorical_strategy': config.encoding.method,
-                'max_categories_for_onehot': config.encoding.max_categories
-            }
-            feature_config.update(encoding_config)
+        } | map_config_section(config.encoding, ENCODING_KEY_MAP)
         
         if config.feature_selection:
-            selection_config = {
-                'feature_selection': config.feature_selection.method,
-                'feature_selection_params': {
-                    'k': config.feature_selection.max_features,
-                    'threshold': config.feature_selection.min_importance
-                }
+            feature_config['feature_selection'] = config.feature_selection.method
+            feature_config['feature_selection_params'] = {
+                'k': config.feature_selection.max_features,
+                'threshold': config.feature_selection.min_importance
             }
-            feature_config.update(selection_config)
             
         return feature_config
     
@@ -150,7 +480,7 @@ class ProcessorUploadService:
             'metric': 'accuracy' if task == 'classification' else 'r2',
             'task': task,
             'base_model': 'rf',
-            'verbose': True
+            'verbose': settings.CAFE_VALIDATOR_VERBOSE
         }
         
         return validator_config
@@ -160,7 +490,12 @@ class ProcessorUploadService:
 
     async def _process_dataset_task(self, processing_id: str, config: ProcessingConfig):
         try:
-            df = await self.fetch_dataset(config.dataset_id)
+            try:
+                df = await self.fetch_dataset(config.dataset_id)
+            except DatasetTooLargeError as e:
+                await update_processing_status(processing_id, "error", error_message=str(e))
+                return
+            
             if df is None:
                 await update_processing_status(
                     processing_id, 
@@ -177,13 +512,51 @@ class ProcessorUploadService:
                 # Verificar se o modo de exploração automática está ativado
                 use_explorer = config.feature_selection and config.feature_selection.method == 'auto'
                 
-                results = await loop.run_in_executor(
-                    None, 
-                    self._process_data_sync if not use_explorer else self._process_data_with_explorer, 
-                    df, 
-                    config,
-                    processing_id
-                )
+                report_folder = os.path.join(settings.PROCESSED_FOLDER, processing_id)
+                
+                # Mesmo dataset com a mesma configuração: reaproveita o resultado anterior
+                results = None
+                cache_key = None
+                content_hash = df.attrs.get("content_hash")
+                if content_hash:
+                    cache_key = pipeline_cache_key(content_hash, config)
+                    results = await asyncio.to_thread(load_cached_results, cache_key, report_folder)
+                    if results is not None:
+                        logger.info(f"Resultado do pipeline recuperado do cache para o processamento {processing_id}")
+                
+                if results is None:
+                    # O pipeline roda em outro processo; o dataset vai como arquivo IPC do Arrow
+                    # em memória compartilhada, e só o caminho atravessa o pipe do pool
+                    dataset_path = None
+                    # Configurações do CAFE montadas aqui, onde o cache de configurações persiste
+                    # (os processos filhos do pool começam com caches vazios)
+                    cafe_configs = None if use_explorer else self._build_cafe_configs(config)
+                    try:
+                        dataset_path = await asyncio.to_thread(write_dataset_for_worker, df, processing_id)
+                        # O processo filho reconstrói o próprio DataFrame: esta cópia não precisa
+                        # ficar viva durante todo o pipeline
+                        del df
+                        results = await loop.run_in_executor(
+                            get_processing_pool(),
+                            run_processing_job,
+                            dataset_path,
+                            config,
+                            processing_id,
+                            bool(use_explorer),
+                            cafe_configs
+                        )
+                    except BrokenProcessPool as e:
+                        # Um processo filho morreu (tipicamente sem memória para o dataset) e o
+                        # pool ficou inutilizável: descarta para o próximo processamento criar outro
+                        shutdown_processing_pool()
+                        raise RuntimeError("processo do pipeline encerrado inesperadamente (possível falta de memória)") from e
+                    finally:
+                        if dataset_path:
+                            with contextlib.suppress(FileNotFoundError):
+                                os.remove(dataset_path)
+                    
+                    if results and cache_key:
+                        await asyncio.to_thread(store_cached_results, cache_key, report_folder, results)
                 
                 if results:
                     processing_results.update(results)
@@ -193,9 +566,10 @@ class ProcessorUploadService:
                     if validation_results:
                         best_choice = validation_results.get('best_choice')
                     
-                    await update_processing_results(
-                        processing_id,
+                    await upsert_processing_results(
                         {
+                            "id": processing_id,
+                            "dataset_id": config.dataset_id,
                             "status": "completed",
                             "target_column": config.target_column,
                             "best_choice": best_choice,
@@ -227,6 +601,9 @@ class ProcessorUploadService:
                 "error", 
                 error_message=f"Erro durante processamento: {str(e)}"
             )
+        finally:
+            # Leituras em cache deste processamento ficaram desatualizadas
+            invalidate_processing_cache(processing_id)
 
     def _process_data_with_explorer(self, df, config, processing_id):
         """
@@ -271,9 +648,11 @@ class ProcessorUploadService:
             logger.info("Aplicando pipeline otimizado aos dados...")
             transformed_df = pipeline.fit_transform(df, target_col=target_col)
             
-            # Salvar o dataset transformado
-            transformed_file_path = os.path.join(report_folder, f"{config.dataset_id}_transformed.csv")
-            transformed_df.to_csv(transformed_file_path, index=False)
+            # Salvar o dataset transformado em paralelo com os relatórios e visualizações
+            # (o writer do Arrow libera o GIL); a gravação é concluída antes do retorno
+            transformed_write = transformed_file_writer.submit(
+                write_transformed_dataset, transformed_df, report_folder, config.dataset_id
+            )
             
             # Visualizar árvore de transformações (opcional)
             explorer.visualize_transformations(os.path.join(report_folder, "transformation_tree.png"))
@@ -377,6 +756,9 @@ class ProcessorUploadService:
             # Extrair transformações aplicadas pelo pipeline
             transformations_list = self._extract_transformations(pipeline)
             
+            # O dataset transformado precisa estar em disco quando o status virar completed
+            transformed_write.result()
+            
             # Preparar resultados para retorno
             results = {
                 "preprocessing_config": best_config.get('preprocessor_config', {}),
@@ -395,12 +777,20 @@ class ProcessorUploadService:
             logger.error(f"Erro durante exploração automática: {str(e)}")
             raise
     
-    def _process_data_sync(self, df, config, processing_id):
+    def _build_cafe_configs(self, config: ProcessingConfig) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """Configurações do preprocessor, feature engineer e validator do CAFE"""
+        return (
+            self._build_preprocessor_config(config),
+            self._build_feature_engineer_config(config),
+            self._build_validator_config(config)
+        )
+
+    def _process_data_sync(self, df, config, processing_id, cafe_configs=None):
         try:
-            # Configurar CAFE
-            preprocessor_config = self._build_preprocessor_config(config)
-            feature_engineer_config = self._build_feature_engineer_config(config)
-            validator_config = self._build_validator_config(config)
+            # Configurar CAFE (montadas no processo principal quando possível, onde o cache de configurações é mantido)
+            preprocessor_config, feature_engineer_config, validator_config = (
+                cafe_configs or self._build_cafe_configs(config)
+            )
             
             # Criar pipeline CAFE
             pipeline = create_data_pipeline(
@@ -418,9 +808,13 @@ class ProcessorUploadService:
             report_folder = os.path.join(settings.PROCESSED_FOLDER, processing_id)
             os.makedirs(report_folder, exist_ok=True)
             
-            # Salvar o dataset transformado
-            transformed_file_path = os.path.join(report_folder, f"{config.dataset_id}_transformed.csv")
-            transformed_df.to_csv(transformed_file_path, index=False)
+            # Salvar o dataset transformado em paralelo com os relatórios e visualizações
+            # (o writer do Arrow libera o GIL); a gravação é concluída antes do retorno
+            transformed_write = transformed_file_writer.submit(
+                write_transformed_dataset, transformed_df, report_folder, config.dataset_id
+            )
+            # Daqui em diante só a gravação usa o dataset transformado: ele é liberado ao fim dela
+            del transformed_df
             
             # Criar ReportDataPipeline para gerar relatórios
             reporter = ReportDataPipeline(
@@ -518,6 +912,9 @@ class ProcessorUploadService:
             # Extrair transformações aplicadas pelo pipeline
             transformations_list = self._extract_transformations(pipeline)
             
+            # O dataset transformado precisa estar em disco quando o status virar completed
+            transformed_write.result()
+            
             # Preparar resultados para retorno
             results = {
                 "preprocessing_config": preprocessor_config,
@@ -539,66 +936,40 @@ class ProcessorUploadService:
         try:
             transformations = []
             
-            # Transformações do preprocessor
-            preprocessor = pipeline.preprocessor
-            if hasattr(preprocessor, 'transformations_applied'):
-                for transform in preprocessor.transformations_applied:
-                    transformation = {
-                        'column': transform.get('column', ''),
-                        'original_type': transform.get('original_type', ''),
-                        'transformation_type': transform.get('type', ''),
-                        'details': transform.get('details', {})
-                    }
-                    
-                    # Certifique-se de que os valores são serializáveis
-                    if 'details' in transformation and transformation['details']:
-                        try:
-                            # Converter valores numpy para valores Python nativos
-                            details = {}
-                            for k, v in transformation['details'].items():
-                                if hasattr(v, 'tolist'):  # Numpy array
-                                    details[k] = v.tolist()
-                                elif hasattr(v, 'item'):  # Numpy scalar
-                                    details[k] = v.item()
-                                else:
-                                    details[k] = v
-                            transformation['details'] = details
-                        except Exception as e:
-                            logger.warning(f"Erro ao processar detalhes da transformação: {str(e)}")
-                            transformation['details'] = {}
-                    
-                    transformations.append(transformation)
-            
-            # Transformações do feature engineer
-            feature_engineer = pipeline.feature_engineer
-            if hasattr(feature_engineer, 'transformations_applied'):
-                for transform in feature_engineer.transformations_applied:
-                    transformation = {
-                        'column': transform.get('column', ''),
-                        'original_type': transform.get('original_type', ''),
-                        'transformation_type': transform.get('type', ''),
-                        'details': transform.get('details', {})
-                    }
-                    
-                    # Mesma lógica de processamento para detalhes
-                    if 'details' in transformation and transformation['details']:
-                        try:
-                            details = {}
-                            for k, v in transformation['details'].items():
-                                if hasattr(v, 'tolist'):
-                                    details[k] = v.tolist()
-                                elif hasattr(v, 'item'):
-                                    details[k] = v.item()
-                                else:
-                                    details[k] = v
-                            transformation['details'] = details
-                        except Exception as e:
-                            logger.warning(f"Erro ao processar detalhes da transformação: {str(e)}")
-                            transformation['details'] = {}
-                    
-                    transformations.append(transformation)
+            # Transformações do preprocessor e do feature engineer, percorridas em uma única passada
+            sources = (
+                getattr(pipeline.preprocessor, 'transformations_applied', None),
+                getattr(pipeline.feature_engineer, 'transformations_applied', None)
+            )
+            
+            for transform in chain.from_iterable(filter(None, sources)):
+                details = transform.get('details', {})
+                
+                # Certifique-se de que os valores são serializáveis (numpy -> Python nativo)
+                if details:
+                    try:
+                        details = {k: to_native(v) for k, v in details.items()}
+                    except Exception as e:
+                        logger.warning(f"Erro ao processar detalhes da transformação: {str(e)}")
+                        details = {}
+                
+                transformations.append({
+                    'column': transform.get('column', ''),
+                    'original_type': transform.get('original_type', ''),
+                    'transformation_type': transform.get('type', ''),
+                    'details': details
+                })
                     
             return transformations if transformations else None
         except Exception as e:
             logger.warning(f"Erro ao extrair transformações aplicadas: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+def run_processing_job(dataset_path: str, config: ProcessingConfig, processing_id: str, use_explorer: bool,
+                       cafe_configs: Optional[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]] = None):
+    """Executado no processo filho do pool: reconstrói o DataFrame e roda o pipeline CAFE"""
+    df = read_dataset_ipc(dataset_path)
+    service = ProcessorUploadService()
+    if use_explorer:
+        return service._process_data_with_explorer(df, config, processing_id)
+    return service._process_data_sync(df, config, processing_id, cafe_configs)
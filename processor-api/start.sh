@@ -11,4 +11,5 @@ alembic upgrade head
 
 # Iniciar a aplicação
 echo "Iniciando a API de Processamento..."
-exec uvicorn main:app --host 0.0.0.0 --port 8002
\ No newline at end of file
+# Um worker por padrão: os caches em memória são por processo (ver WORKERS em config.py)
+exec uvicorn main:app --host 0.0.0.0 --port 8002 --loop uvloop --http httptools --workers "${WORKERS:-1}"
\ No newline at end of file
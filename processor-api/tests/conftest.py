@@ -0,0 +1,34 @@
+import sys
+import types
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import SQLAlchemyError
+
+# Sem o CAFE instalado, os testes do próprio CAFE são ignorados e um módulo substituto
+# permite importar os serviços; os testes que não executam o pipeline rodam normalmente
+try:
+    import cafe
+except ImportError:
+    def _cafe_unavailable(*args, **kwargs):
+        raise RuntimeError("CAFE não instalado")
+
+    cafe = types.ModuleType("cafe")
+    cafe.create_data_pipeline = _cafe_unavailable
+    cafe.Explorer = cafe.ReportDataPipeline = cafe.ReportVisualizer = _cafe_unavailable
+    sys.modules["cafe"] = cafe
+
+    collect_ignore = ["test_preprocessor.py", "test_feature_engineer.py"]
+
+@pytest.fixture(scope="session")
+def client():
+    """Cliente da API com o banco configurado em DATABASE_URL (testes pulados se indisponível)"""
+    import main
+
+    test_client = TestClient(main.app)
+    try:
+        test_client.__enter__()
+    except (OSError, SQLAlchemyError) as e:
+        pytest.skip(f"Banco de dados indisponível: {e}")
+
+    yield test_client
+    test_client.__exit__(None, None, None)
@@ -0,0 +1,68 @@
+import uuid
+import pytest
+import database.db as db
+
+@pytest.fixture
+def processing_id(client):
+    """Cria um registro de processamento e retorna seu ID"""
+    processing_id = str(uuid.uuid4())
+    client.portal.call(db.upsert_processing_results, {
+        "id": processing_id,
+        "dataset_id": "dataset-db",
+        "status": "processing",
+        "transformation_statistics": {}
+    })
+    return processing_id
+
+def test_upsert_inserts_and_updates(client, processing_id):
+    """Testa se o upsert insere o registro e depois atualiza só os campos enviados"""
+    record = client.portal.call(db.get_processing_results, processing_id)
+    assert record["status"] == "processing"
+    assert record["best_choice"] == "original"
+
+    client.portal.call(db.upsert_processing_results, {
+        "id": processing_id,
+        "dataset_id": "dataset-db",
+        "status": "completed",
+        "missing_values_report": [{"column": "a", "missing_count": 2}]
+    })
+
+    updated = client.portal.call(db.get_processing_results, processing_id)
+    assert updated["status"] == "completed"
+    assert updated["missing_values_report"] == [{"column": "a", "missing_count": 2}]
+    assert updated["transformation_statistics"] == {}
+    assert updated["created_at"] == record["created_at"]
+    assert updated["updated_at"] >= record["updated_at"]
+
+def test_upsert_requires_mandatory_fields(client):
+    """Testa se o upsert rejeita registros sem id, dataset_id ou status"""
+    with pytest.raises(ValueError):
+        client.portal.call(db.upsert_processing_results, {"id": str(uuid.uuid4()), "status": "processing"})
+
+def test_update_processing_status(client, processing_id):
+    """Testa a atualização de status de um processamento existente"""
+    assert client.portal.call(db.update_processing_status, processing_id, "failed", "erro") is True
+
+    record = client.portal.call(db.get_processing_results, processing_id)
+    assert record["status"] == "failed"
+    assert record["error_message"] == "erro"
+
+def test_update_processing_status_missing_id(client):
+    """Testa se a atualização de status retorna False para um ID inexistente"""
+    assert client.portal.call(db.update_processing_status, str(uuid.uuid4()), "failed") is False
+
+def test_update_processing_results(client, processing_id):
+    """Testa a atualização de campos de um processamento existente"""
+    updated = client.portal.call(db.update_processing_results, processing_id, {
+        "status": "completed",
+        "transformations_applied": [{"type": "scaling"}]
+    })
+    assert updated is True
+
+    summary = client.portal.call(db.get_processing_summary, processing_id)
+    assert summary["status"] == "completed"
+    assert summary["transformations_count"] == 1
+
+def test_update_processing_results_missing_id(client):
+    """Testa se a atualização de campos retorna False para um ID inexistente"""
+    assert client.portal.call(db.update_processing_results, str(uuid.uuid4()), {"status": "completed"}) is False
@@ -0,0 +1,53 @@
+import pytest
+import pandas as pd
+import pyarrow.parquet as pq
+from services.processor_upload_service import read_dataset_csv, write_transformed_dataset
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    """Cria um CSV com os tipos em que a inferência do Arrow difere da do pandas"""
+    content = (
+        "id,price,name,flag,flag01,created,day,hour,code,mixed,empty,nulls\n"
+        "1,1.5,alpha,True,1,2024-01-02 10:00:00,2024-01-02,10:30:00,007,a,,None\n"
+        "2,,beta,false,0,2024-01-03T11:00:00,2024-01-03,11:45:00,010,1,,NA\n"
+        "3,2.25,,TRUE,1,2024-01-04 12:00:00,2024-01-04,12:00:00,020,2.5,,<NA>\n"
+    )
+    file_path = tmp_path / "sample.csv"
+    file_path.write_text(content)
+    return str(file_path)
+
+def test_read_dataset_csv_matches_pandas_dtypes(sample_csv):
+    """Testa se a leitura com o Arrow produz os mesmos dtypes do pd.read_csv"""
+    df = read_dataset_csv(sample_csv)
+    expected = pd.read_csv(sample_csv)
+
+    pd.testing.assert_series_equal(df.dtypes, expected.dtypes)
+
+def test_read_dataset_csv_matches_pandas_values(sample_csv):
+    """Testa se datas, horários, ausentes e booleanos são lidos como no pd.read_csv"""
+    df = read_dataset_csv(sample_csv)
+    expected = pd.read_csv(sample_csv)
+
+    pd.testing.assert_frame_equal(df, expected)
+    # Datas e horários mantêm o texto original
+    assert df['created'].tolist() == expected['created'].tolist()
+    assert df['empty'].isna().all()
+    assert df['nulls'].isna().all()
+
+def test_write_transformed_dataset_parquet(tmp_path):
+    """Testa se o dataset transformado é gravado em Parquet"""
+    df = pd.DataFrame({'numeric': [1.5, 2.5], 'category': ['A', 'B'], 'target': [0, 1]})
+
+    file_path = write_transformed_dataset(df, str(tmp_path), 'dataset')
+
+    assert file_path == str(tmp_path / 'dataset_transformed.parquet')
+    pd.testing.assert_frame_equal(pq.read_table(file_path).to_pandas(), df, check_dtype=False)
+
+def test_write_transformed_dataset_csv_fallback(tmp_path):
+    """Testa se colunas que o Arrow não consegue tipar fazem o dataset cair no CSV"""
+    df = pd.DataFrame({'mixed': [1, 'a'], 'target': [0, 1]}, dtype=object)
+
+    file_path = write_transformed_dataset(df, str(tmp_path), 'dataset')
+
+    assert file_path == str(tmp_path / 'dataset_transformed.csv')
+    assert pd.read_csv(file_path)['target'].tolist() == [0, 1]
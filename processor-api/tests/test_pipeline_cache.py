@@ -0,0 +1,73 @@
+import os
+import pytest
+from config import settings
+from models.processing_models import ProcessingConfig, ScalingConfig
+from services.pipeline_cache import (
+    hash_file, pipeline_cache_key, load_cached_results, store_cached_results, evict_cached_results
+)
+
+@pytest.fixture
+def cache_folder(tmp_path, monkeypatch):
+    """Pasta de cache isolada por teste"""
+    folder = tmp_path / "pipeline_cache"
+    folder.mkdir()
+    monkeypatch.setattr(settings, "PIPELINE_CACHE_FOLDER", str(folder))
+    return folder
+
+@pytest.fixture
+def report_folder(tmp_path):
+    """Pasta de um processamento com um dataset transformado e uma visualização"""
+    folder = tmp_path / "processed"
+    folder.mkdir()
+    (folder / "dataset_transformed.parquet").write_bytes(b"parquet")
+    (folder / "correlation.png").write_bytes(b"png")
+    return folder
+
+def test_hash_file(tmp_path):
+    """Testa se o hash depende apenas do conteúdo do arquivo"""
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    first.write_text("a,b\n1,2\n")
+    second.write_text("a,b\n1,2\n")
+
+    assert hash_file(str(first)) == hash_file(str(second))
+
+    second.write_text("a,b\n1,3\n")
+    assert hash_file(str(first)) != hash_file(str(second))
+
+def test_pipeline_cache_key(monkeypatch):
+    """Testa se a chave muda com o conteúdo, a configuração e as configurações do CAFE"""
+    config = ProcessingConfig(dataset_id="dataset")
+    key = pipeline_cache_key("hash", config)
+
+    assert pipeline_cache_key("hash", ProcessingConfig(dataset_id="dataset")) == key
+    assert pipeline_cache_key("other-hash", config) != key
+    assert pipeline_cache_key("hash", ProcessingConfig(dataset_id="dataset", scaling=ScalingConfig(method="minmax"))) != key
+
+    monkeypatch.setattr(settings, "CAFE_CV_FOLDS", settings.CAFE_CV_FOLDS + 1)
+    assert pipeline_cache_key("hash", config) != key
+
+def test_cache_miss(cache_folder, tmp_path):
+    """Testa se uma chave sem entrada retorna None"""
+    assert load_cached_results("missing", str(tmp_path / "target")) is None
+
+def test_cache_hit(cache_folder, report_folder, tmp_path):
+    """Testa se um resultado guardado é recuperado com os arquivos do processamento"""
+    results = {"validation_results": {"best_choice": "transformed"}, "transformations_applied": [{"type": "scaling"}]}
+    store_cached_results("key", str(report_folder), results)
+
+    target_folder = tmp_path / "new_processing"
+    assert load_cached_results("key", str(target_folder)) == results
+    assert (target_folder / "dataset_transformed.parquet").read_bytes() == b"parquet"
+    assert (target_folder / "correlation.png").read_bytes() == b"png"
+
+def test_cache_eviction(cache_folder, report_folder, monkeypatch):
+    """Testa se as entradas menos usadas são removidas além de PIPELINE_CACHE_MAX_ENTRIES"""
+    monkeypatch.setattr(settings, "PIPELINE_CACHE_MAX_ENTRIES", 2)
+
+    for index, key in enumerate(["oldest", "middle", "newest"]):
+        store_cached_results(key, str(report_folder), {"index": index})
+        os.utime(cache_folder / key, (index, index))
+    evict_cached_results()
+
+    assert sorted(os.listdir(cache_folder)) == ["middle", "newest"]
@@ -0,0 +1,136 @@
+import io
+import os
+import uuid
+import pytest
+import pandas as pd
+import pyarrow.parquet as pq
+from sqlalchemy.exc import SQLAlchemyError
+import database.db as db
+from config import settings
+from routes import processor_routes
+from services import processor_service as processor_service_module
+from services.processor_upload_service import write_transformed_dataset
+
+def create_processing(client, status="completed", dataset_id="dataset-routes"):
+    """Cria um registro de processamento e retorna seu ID"""
+    processing_id = str(uuid.uuid4())
+    client.portal.call(db.upsert_processing_results, {
+        "id": processing_id,
+        "dataset_id": dataset_id,
+        "status": status,
+        "target_column": "target",
+        "validation_results": {"best_choice": "transformed", "performance_diff_pct": 1.5},
+        "transformation_statistics": {"total_transformations_tested": 3, "best_transformation": "scaling"},
+        "transformations_applied": [{"type": "scaling"}]
+    })
+    return processing_id
+
+@pytest.fixture
+def threadpool_calls(monkeypatch):
+    """Registra as chamadas ao threadpool feitas pela rota de lote"""
+    calls = []
+    run_in_threadpool = processor_routes.run_in_threadpool
+
+    async def recording_run_in_threadpool(func, *args, **kwargs):
+        calls.append(func)
+        return await run_in_threadpool(func, *args, **kwargs)
+
+    monkeypatch.setattr(processor_routes, "run_in_threadpool", recording_run_in_threadpool)
+    return calls
+
+def test_batch_keeps_order_and_skips_missing(client, threadpool_calls):
+    """Testa se o lote segue a ordem dos IDs e omite os não encontrados"""
+    processing_ids = [create_processing(client) for _ in range(3)]
+    requested = [processing_ids[2], str(uuid.uuid4()), processing_ids[0], processing_ids[1]]
+
+    response = client.post("/api/v1/process/batch", json={"ids": requested})
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [processing_ids[2], processing_ids[0], processing_ids[1]]
+    assert response.json()[0]["status"] == "completed"
+    assert response.json()[0]["target_column"] == "target"
+    # Lotes pequenos são serializados no event loop
+    assert threadpool_calls == []
+
+def test_batch_above_threshold_uses_threadpool(client, threadpool_calls):
+    """Testa se lotes acima de BATCH_THREADPOOL_THRESHOLD são serializados no threadpool"""
+    total = processor_routes.BATCH_THREADPOOL_THRESHOLD + 10
+    processing_ids = [create_processing(client) for _ in range(total)]
+
+    response = client.post("/api/v1/process/batch", json={"ids": processing_ids})
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == processing_ids
+    assert threadpool_calls == [processor_routes.render_processing_batch]
+
+def test_batch_database_error(client, monkeypatch):
+    """Testa se um erro de banco no lote responde 500 em vez de uma lista vazia"""
+    async def failing_get_processing_summaries(*args, **kwargs):
+        raise SQLAlchemyError("banco indisponível")
+
+    monkeypatch.setattr(processor_service_module, "get_processing_summaries", failing_get_processing_summaries)
+
+    response = client.post("/api/v1/process/batch", json={"ids": [str(uuid.uuid4())]})
+
+    assert response.status_code == 500
+    assert "banco indisponível" in response.json()["detail"]
+
+def test_batch_rejects_empty_request(client):
+    """Testa se um lote sem IDs é rejeitado na validação"""
+    response = client.post("/api/v1/process/batch", json={"ids": []})
+    assert response.status_code == 422
+
+@pytest.fixture
+def transformed_dataset(client):
+    """Cria um processamento com o dataset transformado gravado em Parquet"""
+    processing_id = create_processing(client, dataset_id="dataset-download")
+    df = pd.DataFrame({
+        "numeric": [1.5, 2.5, 3.5],
+        "category": ["A", "B", "A"],
+        "target": [0, 1, 0]
+    })
+    report_folder = os.path.join(settings.PROCESSED_FOLDER, processing_id)
+    os.makedirs(report_folder, exist_ok=True)
+    file_path = write_transformed_dataset(df, report_folder, "dataset-download")
+    return processing_id, df, file_path
+
+def test_download_parquet(client, transformed_dataset):
+    """Testa o download do dataset transformado em Parquet (formato padrão)"""
+    processing_id, df, file_path = transformed_dataset
+    assert file_path.endswith(".parquet")
+
+    response = client.get(f"/api/v1/process/{processing_id}/dataset")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    downloaded = pq.read_table(io.BytesIO(response.content)).to_pandas()
+    pd.testing.assert_frame_equal(downloaded, df, check_dtype=False)
+
+def test_download_csv(client, transformed_dataset):
+    """Testa a conversão sob demanda do Parquet transformado em CSV"""
+    processing_id, df, file_path = transformed_dataset
+
+    response = client.get(f"/api/v1/process/{processing_id}/dataset", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    downloaded = pd.read_csv(io.BytesIO(response.content))
+    pd.testing.assert_frame_equal(downloaded, df, check_dtype=False)
+    assert os.path.exists(file_path[:-len(".parquet")] + ".csv")
+
+def test_download_invalid_format(client, transformed_dataset):
+    """Testa se formatos diferentes de parquet e csv são rejeitados"""
+    processing_id, _, _ = transformed_dataset
+    response = client.get(f"/api/v1/process/{processing_id}/dataset", params={"format": "xlsx"})
+    assert response.status_code == 422
+
+def test_download_missing_file(client):
+    """Testa o 404 quando o processamento não tem dataset transformado"""
+    processing_id = create_processing(client, status="processing")
+    response = client.get(f"/api/v1/process/{processing_id}/dataset")
+    assert response.status_code == 404
+
+def test_download_missing_processing(client):
+    """Testa o 404 para um processamento inexistente"""
+    response = client.get(f"/api/v1/process/{uuid.uuid4()}/dataset")
+    assert response.status_code == 404